@@ -0,0 +1,6 @@
+"""Ferramentas de benchmark e carga do Representa.
+
+Os módulos deste pacote são executados a partir da raiz do projeto, por exemplo:
+
+    python -m benchmarks.bench_representa --escalas minima pequena
+"""
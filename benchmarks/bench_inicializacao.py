@@ -0,0 +1,197 @@
+"""Benchmark de inicialização a frio do servidor.
+
+Cada medição roda em um processo Python novo (nada em cache no interpretador), dentro de um
+diretório temporário com um `db.json` sintético:
+
+- `importtime`: resumo de `python -X importtime -c "import server"` — tempo total, os módulos
+  mais caros e se dependências pesadas opcionais (smtplib, email.mime, asyncio) foram
+  carregadas no boot;
+- `primeira_resposta`: tempo de importação do `server` e das duas primeiras requisições
+  (`POST /login` e `GET /dashboard`), com e sem `REPRESENTA_PREAQUECER=1`.
+
+Uso:
+    python -m benchmarks.bench_inicializacao --escala media --repeticoes 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.bench_representa import _commit_atual
+from benchmarks.dados_sinteticos import ESCALAS, SENHA_PADRAO, email_representante, gerar_arquivo
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIRETORIO)
+SAIDA_PADRAO = os.path.join(DIRETORIO, 'resultados', 'inicializacao.json')
+
+# Módulos que não deveriam ser importados só para subir o servidor.
+MODULOS_PESADOS = ('smtplib', 'email.mime', 'asyncio')
+
+_LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Executado no processo filho: mede importação e as primeiras requisições com o cliente de teste.
+_SCRIPT_PRIMEIRA_RESPOSTA = """
+import contextlib, io, json, sys, time
+inicio = time.perf_counter()
+import server
+importado = time.perf_counter()
+cliente = server.app.test_client()
+with contextlib.redirect_stdout(io.StringIO()):
+    r1 = cliente.post('/login', data={'email': sys.argv[1], 'password': sys.argv[2]})
+    primeira = time.perf_counter()
+    r2 = cliente.get('/dashboard')
+    segunda = time.perf_counter()
+assert r1.status_code == 302 and r2.status_code == 200, (r1.status_code, r2.status_code)
+print(json.dumps({
+    'importacao_ms': (importado - inicio) * 1000,
+    'primeira_requisicao_ms': (primeira - importado) * 1000,
+    'segunda_requisicao_ms': (segunda - primeira) * 1000,
+    'ate_primeira_resposta_ms': (primeira - inicio) * 1000,
+}))
+"""
+
+
+def _ambiente(preaquecer: bool = False) -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = RAIZ + (os.pathsep + env['PYTHONPATH'] if env.get('PYTHONPATH') else '')
+    env.pop('REPRESENTA_PREAQUECER', None)
+    if preaquecer:
+        env['REPRESENTA_PREAQUECER'] = '1'
+    return env
+
+
+def analisar_importtime(saida: str) -> dict:
+    """Converte a saída de `-X importtime` em {módulo: (próprio_us, acumulado_us, nível)}."""
+    modulos = {}
+    for linha in saida.splitlines():
+        m = _LINHA_IMPORTTIME.match(linha)
+        if m:
+            proprio, acumulado, recuo, nome = m.groups()
+            modulos.setdefault(nome, (int(proprio), int(acumulado), len(recuo) // 2))
+    return modulos
+
+
+def dependencias_diretas(modulos: dict, raiz: str = 'server') -> list:
+    """Filhos diretos de `raiz` em {módulo: (próprio_us, acumulado_us, nível)}, na ordem da saída.
+
+    O `-X importtime` imprime os filhos antes do pai, então o bloco de `raiz` são as linhas
+    imediatamente anteriores a ela com nível maior; módulos carregados na inicialização do
+    interpretador (`site`, `encodings`) ficam fora do bloco.
+    """
+    itens = list(modulos.items())
+    nomes = [n for n, _ in itens]
+    fim = nomes.index(raiz)
+    nivel = itens[fim][1][2]
+    inicio = fim
+    while inicio > 0 and itens[inicio - 1][1][2] > nivel:
+        inicio -= 1
+    return [(n, v) for n, v in itens[inicio:fim] if v[2] == nivel + 1]
+
+
+def resumir_importtime(diretorio: str, repeticoes: int, top: int) -> dict:
+    """Roda `import server` com `-X importtime` e resume a execução mediana."""
+    execucoes = []
+    for _ in range(repeticoes):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import server'], cwd=diretorio,
+                              env=_ambiente(), capture_output=True, text=True, check=True)
+        execucoes.append(analisar_importtime(proc.stderr))
+    execucoes.sort(key=lambda m: m['server'][1])
+    modulos = execucoes[len(execucoes) // 2]
+
+    diretos = dependencias_diretas(modulos)
+    return {
+        'total_ms': round(modulos['server'][1] / 1000, 3),
+        'totais_ms': [round(m['server'][1] / 1000, 3) for m in execucoes],
+        'modulos_importados': len(modulos),
+        'dependencias_diretas': [
+            {'modulo': n, 'acumulado_ms': round(v[1] / 1000, 3)}
+            for n, v in sorted(diretos, key=lambda x: -x[1][1])[:top]
+        ],
+        'mais_caros_proprio': [
+            {'modulo': n, 'proprio_ms': round(v[0] / 1000, 3)}
+            for n, v in sorted(modulos.items(), key=lambda x: -x[1][0])[:top]
+        ],
+        'pesados_carregados': {p: any(n == p or n.startswith(p + '.') for n in modulos) for p in MODULOS_PESADOS},
+    }
+
+
+def medir_primeira_resposta(diretorio: str, email: str, preaquecer: bool, repeticoes: int) -> dict:
+    """Mediana de cada fase em `repeticoes` processos novos."""
+    amostras = []
+    for _ in range(repeticoes):
+        proc = subprocess.run([sys.executable, '-c', _SCRIPT_PRIMEIRA_RESPOSTA, email, SENHA_PADRAO],
+                              cwd=diretorio, env=_ambiente(preaquecer), capture_output=True, text=True, check=True)
+        amostras.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {chave: round(statistics.median(a[chave] for a in amostras), 3) for chave in amostras[0]}
+
+
+def executar(escala: str, repeticoes: int, top: int) -> dict:
+    representantes, _, _ = ESCALAS[escala]
+    diretorio = tempfile.mkdtemp(prefix=f"representa-boot-{escala}-")
+    try:
+        caminho = os.path.join(diretorio, 'db.json')
+        resumo = gerar_arquivo(escala, caminho)
+        resumo['tamanho_bytes'] = os.path.getsize(caminho)
+        # O último representante é o pior caso para buscas lineares.
+        alvo = email_representante(representantes - 1)
+        return {
+            'dados': resumo,
+            'importtime': resumir_importtime(diretorio, repeticoes, top),
+            'primeira_resposta': {
+                'sem_preaquecimento': medir_primeira_resposta(diretorio, alvo, False, repeticoes),
+                'com_preaquecimento': medir_primeira_resposta(diretorio, alvo, True, repeticoes),
+            },
+        }
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def imprimir(resultado: dict) -> None:
+    imp = resultado['importtime']
+    print(f"import server: {imp['total_ms']:.1f}ms ({imp['modulos_importados']} módulos)")
+    for item in imp['dependencias_diretas']:
+        print(f"  {item['modulo']:<40} {item['acumulado_ms']:>9.2f}ms")
+    for pesado, carregado in imp['pesados_carregados'].items():
+        print(f"  {pesado:<40} {'importado' if carregado else 'não importado'}")
+    for modo, fases in resultado['primeira_resposta'].items():
+        print(f"{modo}: " + ', '.join(f"{k}={v:.1f}" for k, v in fases.items()))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização a frio do servidor.')
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='media')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='quantos módulos listar no resumo')
+    parser.add_argument('--saida', default=SAIDA_PADRAO, help='arquivo JSON de resultados')
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.escala, args.repeticoes, args.top)
+    imprimir(resultado)
+    relatorio = {
+        'meta': {
+            'commit': _commit_atual(),
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'repeticoes': args.repeticoes,
+        },
+        'resultados': {args.escala: resultado},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.saida}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
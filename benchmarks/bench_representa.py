@@ -0,0 +1,276 @@
+"""Suíte de benchmarks do Representa.
+
+Para cada escala de `benchmarks.dados_sinteticos` gera um `db.json` temporário e mede:
+
+- cada operação do `JSONRepository` (leituras e escritas);
+- a hidratação de modelos no `RepresentanteService`;
+- `get_dashboard_chart_data`;
+- as rotas `/login`, `/dashboard` e `/registrar` de ponta a ponta via cliente de teste do Flask.
+
+Os resultados são gravados em JSON (tempos em milissegundos) para comparação entre commits:
+
+    python -m benchmarks.bench_representa --salvar-baseline
+    python -m benchmarks.bench_representa --comparar benchmarks/baseline.json
+
+Com `--comparar`, o processo termina com código 1 se alguma mediana piorar além da tolerância.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.dados_sinteticos import (
+    ESCALAS, ESCALAS_PADRAO, SENHA_PADRAO, email_aluno, email_representante, gerar_arquivo,
+)
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+SAIDA_PADRAO = os.path.join(DIRETORIO, 'resultados', 'ultimo.json')
+BASELINE_PADRAO = os.path.join(DIRETORIO, 'baseline.json')
+
+
+def medir(func, repeticoes: int = 5, aquecimento: int = 1) -> dict:
+    """Executa `func` repetidamente e retorna estatísticas de tempo em milissegundos."""
+    for _ in range(aquecimento):
+        func()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'n': len(tempos),
+        'min_ms': round(tempos[0], 4),
+        'mediana_ms': round(statistics.median(tempos), 4),
+        'media_ms': round(statistics.fmean(tempos), 4),
+        'p95_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 4),
+        'max_ms': round(tempos[-1], 4),
+    }
+
+
+class _Contador:
+    """Gera sufixos únicos para registros criados durante as medições."""
+
+    def __init__(self):
+        self.valor = 0
+
+    def proximo(self) -> int:
+        self.valor += 1
+        return self.valor
+
+
+def bench_repositorio(caminho: str, alvo: str, aluno_alvo: str, repeticoes: int) -> dict:
+    from controle_db import JSONRepository
+
+    repo = JSONRepository(caminho)
+    contador = _Contador()
+    dados = repo.load()
+    aluno_id = next(a['id'] for r in dados['representantes'] if r['email'] == alvo for a in r['alunos'])
+
+    def add_remove_aluno():
+        aluno = repo.add_aluno(alvo, 'bench', f"bench{contador.proximo()}@bench.representa", '0')
+        repo.remove_aluno_by_id(alvo, aluno['id'])
+
+    return {
+        'repo.load': medir(repo.load, repeticoes),
+        'repo.save': medir(lambda: repo.save(dados), repeticoes),
+        'repo.get_representante_by_email': medir(lambda: repo.get_representante_by_email(alvo), repeticoes),
+        'repo.check_aluno_exists': medir(lambda: repo.check_aluno_exists(alvo, aluno_alvo), repeticoes),
+        'repo.get_alunos_of_representante': medir(lambda: repo.get_alunos_of_representante(alvo), repeticoes),
+        'repo.get_mensagens_of_representante': medir(lambda: repo.get_mensagens_of_representante(alvo), repeticoes),
+        'repo.add_aluno+remove_aluno_by_id': medir(add_remove_aluno, repeticoes),
+        'repo.update_aluno': medir(lambda: repo.update_aluno(alvo, aluno_id, {'telefone': '0'}), repeticoes),
+        'repo.adicionar_mensagem': medir(
+            lambda: repo.adicionar_mensagem(alvo, {'assunto': 'bench', 'corpo': 'bench',
+                                                   'data': datetime.now().strftime("%d/%m/%Y %H:%M:%S")}),
+            repeticoes),
+        'repo.add_representante': medir(
+            lambda: repo.add_representante('bench', f"novo{contador.proximo()}@bench.representa", '0', 'x'),
+            repeticoes),
+    }
+
+
+def bench_servico(caminho: str, alvo: str, repeticoes: int) -> dict:
+    from services.controle_representates import RepresentanteService
+    from services.chart_service import get_dashboard_chart_data
+
+    service = RepresentanteService(caminho)
+    bruto = service.buscar_representante_por_email(alvo)
+    rep = service.retornar_representante(alvo)
+    return {
+        'service.retornar_representante': medir(lambda: service.retornar_representante(alvo), repeticoes),
+        'service._dict_to_representante': medir(lambda: service._dict_to_representante(bruto), repeticoes),
+        'service.listar_representantes': medir(service.listar_representantes, repeticoes),
+        'chart.get_dashboard_chart_data': medir(lambda: get_dashboard_chart_data(rep), repeticoes),
+    }
+
+
+def bench_rotas(caminho: str, alvo: str, repeticoes: int) -> dict:
+    import server
+    from services.controle_representates import RepresentanteService
+
+    anterior = server.service
+    limites_anteriores = server.REGISTRO_LIMITE_IP, server.REGISTRO_LIMITE_REPRESENTANTE
+    server.service = RepresentanteService(caminho)
+    server.app.config['TESTING'] = True
+    # Mede as rotas, não o limitador de taxa do auto-cadastro: todas as requisições vêm do mesmo
+    # cliente, e sem o limitador (nem suas idas ao SQLite) os tempos seguem comparáveis com
+    # baselines anteriores.
+    server.REGISTRO_LIMITE_IP = server.REGISTRO_LIMITE_REPRESENTANTE = None
+    contador = _Contador()
+    cliente = server.app.test_client()
+    credenciais = {'email': alvo, 'password': SENHA_PADRAO}
+
+    def login():
+        resp = cliente.post('/login', data=credenciais)
+        assert resp.status_code == 302, resp.status_code
+
+    def dashboard():
+        resp = cliente.get('/dashboard')
+        assert resp.status_code == 200, resp.status_code
+
+    def registrar_get():
+        resp = cliente.get('/registrar')
+        assert resp.status_code == 200, resp.status_code
+
+    def registrar_post():
+        resp = cliente.post('/registrar', data={
+            'nome': 'bench', 'email': f"auto{contador.proximo()}@bench.representa",
+            'telefone': '0', 'representante_email': alvo,
+        })
+        assert resp.status_code == 302, resp.status_code
+
+    try:
+        # As rotas imprimem informações de depuração; não queremos isso na saída do benchmark.
+        with contextlib.redirect_stdout(io.StringIO()):
+            login()
+            return {
+                'rota.POST /login': medir(login, repeticoes),
+                'rota.GET /dashboard': medir(dashboard, repeticoes),
+                'rota.GET /registrar': medir(registrar_get, repeticoes),
+                'rota.POST /registrar': medir(registrar_post, repeticoes),
+            }
+    finally:
+        server.service = anterior
+        server.REGISTRO_LIMITE_IP, server.REGISTRO_LIMITE_REPRESENTANTE = limites_anteriores
+
+
+def executar_escala(escala: str, repeticoes: int, grupos: tuple, migrar: bool = True) -> dict:
+    """Gera o banco sintético da escala em um diretório temporário e roda os grupos pedidos.
+
+    Com `migrar`, o histórico de mensagens é movido para o arquivo particionado antes das
+    medições (formato atual); sem, mede o formato antigo com mensagens inline.
+    """
+    representantes, alunos, _ = ESCALAS[escala]
+    # O último representante é o pior caso para as buscas lineares do repositório.
+    alvo = email_representante(representantes - 1)
+    aluno_alvo = email_aluno(representantes - 1, alunos - 1)
+    diretorio = tempfile.mkdtemp(prefix=f"representa-bench-{escala}-")
+    try:
+        caminho = os.path.join(diretorio, 'db.json')
+        resumo = gerar_arquivo(escala, caminho)
+        if migrar:
+            from controle_db import JSONRepository
+            JSONRepository(caminho).migrar_mensagens_para_arquivo()
+        resumo['mensagens_arquivadas'] = migrar
+        resumo['tamanho_bytes'] = os.path.getsize(caminho)
+        operacoes = {}
+        if 'repositorio' in grupos:
+            operacoes.update(bench_repositorio(caminho, alvo, aluno_alvo, repeticoes))
+        if 'servico' in grupos:
+            operacoes.update(bench_servico(caminho, alvo, repeticoes))
+        if 'rotas' in grupos:
+            operacoes.update(bench_rotas(caminho, alvo, repeticoes))
+        return {'dados': resumo, 'operacoes': operacoes}
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(DIRETORIO),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def comparar(atual: dict, baseline: dict, tolerancia: float) -> list:
+    """Compara medianas com a baseline e retorna a lista de regressões acima da tolerância."""
+    regressoes = []
+    print(f"{'escala':<22} {'operação':<40} {'baseline':>11} {'atual':>11} {'razão':>7}")
+    for escala, resultado in atual['resultados'].items():
+        anteriores = baseline.get('resultados', {}).get(escala, {}).get('operacoes', {})
+        for operacao, stats in resultado['operacoes'].items():
+            if operacao not in anteriores:
+                continue
+            antes = anteriores[operacao]['mediana_ms']
+            depois = stats['mediana_ms']
+            razao = depois / antes if antes else float('inf')
+            marca = ''
+            if razao > 1 + tolerancia:
+                marca = '  <-- regressão'
+                regressoes.append({'escala': escala, 'operacao': operacao, 'razao': round(razao, 3)})
+            print(f"{escala:<22} {operacao:<40} {antes:>9.3f}ms {depois:>9.3f}ms {razao:>6.2f}x{marca}")
+    return regressoes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks do Representa com dados sintéticos.')
+    parser.add_argument('--escalas', nargs='+', choices=sorted(ESCALAS), default=list(ESCALAS_PADRAO))
+    parser.add_argument('--todas', action='store_true', help='roda todas as escalas (inclui as grandes)')
+    parser.add_argument('--grupos', nargs='+', choices=('repositorio', 'servico', 'rotas'),
+                        default=['repositorio', 'servico', 'rotas'])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--sem-migracao', action='store_true',
+                        help='mantém as mensagens inline no db.json (formato anterior ao arquivo)')
+    parser.add_argument('--saida', default=SAIDA_PADRAO, help='arquivo JSON de resultados')
+    parser.add_argument('--salvar-baseline', action='store_true', help=f'também grava em {BASELINE_PADRAO}')
+    parser.add_argument('--comparar', metavar='BASELINE', help='arquivo JSON de baseline para comparação')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='piora relativa aceitável na mediana (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    escalas = sorted(ESCALAS, key=lambda e: ESCALAS[e]) if args.todas else args.escalas
+    relatorio = {
+        'meta': {
+            'commit': _commit_atual(),
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'repeticoes': args.repeticoes,
+        },
+        'resultados': {},
+    }
+    for escala in escalas:
+        print(f"Executando escala '{escala}'...", file=sys.stderr)
+        relatorio['resultados'][escala] = executar_escala(escala, args.repeticoes, tuple(args.grupos),
+                                                         migrar=not args.sem_migracao)
+
+    destinos = [args.saida] + ([BASELINE_PADRAO] if args.salvar_baseline else [])
+    for destino in destinos:
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {destino}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if comparar(relatorio, baseline, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
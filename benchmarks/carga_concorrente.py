@@ -0,0 +1,359 @@
+"""Gerador de carga concorrente para o "dia de matrícula".
+
+Simula o pior caso em produção: um representante divulga o link de `/registrar` para a turma
+inteira ao mesmo tempo, enquanto edita representados no dashboard. Vários processos disparam
+auto-cadastros e edições simultâneas usando o `JSONRepository` e o `FileLock` reais.
+
+Modos:
+- `wsgi`: cada processo importa `server.app` e usa o cliente de teste do Flask (sem rede);
+- `http`: requisições HTTP contra uma instância local já em execução (`--url`), que deve estar
+  usando o mesmo arquivo passado em `--db` para que a verificação de integridade faça sentido
+  (e limites `REGISTRO_LIMITE_*` folgados, ou os cadastros recusados com 429 contam como erro);
+- `repo`: chama o `JSONRepository` diretamente, isolando o custo do armazenamento.
+
+Ao final é impresso (e opcionalmente gravado em JSON) um relatório com vazão, latências
+p50/p95/p99, timeouts de lock e escritas perdidas ou duplicadas (incluindo colisões de `next_id`).
+
+Uso:
+    python -m benchmarks.carga_concorrente --processos 8 --registros 400 --edicoes 80
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.dados_sinteticos import ESCALAS, SENHA_PADRAO, gerar_arquivo
+
+MENSAGEM_TIMEOUT_LOCK = 'could not be acquired'
+
+
+def percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+# --- Executores (um por modo), usados dentro de cada processo de carga ---
+
+class _ExecutorRepo:
+    def __init__(self, args):
+        from controle_db import JSONRepository
+        self.repo = JSONRepository(args.db)
+
+    def registrar(self, tarefa):
+        self.repo.add_aluno(tarefa['representante'], tarefa['nome'], tarefa['email'], tarefa['telefone'])
+
+    def editar(self, tarefa):
+        self.repo.update_aluno(tarefa['representante'], tarefa['aluno_id'], {'telefone': tarefa['telefone']})
+
+
+class _ExecutorWSGI:
+    def __init__(self, args):
+        import server
+        from services.controle_representates import RepresentanteService
+
+        server.service = RepresentanteService(args.db)
+        server.app.config['TESTING'] = True
+        if not args.manter_limites:
+            # Mede o armazenamento, não o limitador de taxa do auto-cadastro.
+            server.REGISTRO_LIMITE_IP = server.REGISTRO_LIMITE_REPRESENTANTE = None
+        self._app = server.app
+        self._senha = args.senha
+        self._publico = server.app.test_client()
+        self._logados = {}
+        # As rotas imprimem informações de depuração a cada requisição; descartamos neste processo.
+        sys.stdout = open(os.devnull, 'w')
+
+    def _cliente(self, representante):
+        cliente = self._logados.get(representante)
+        if cliente is None:
+            cliente = self._app.test_client()
+            resp = cliente.post('/login', data={'email': representante, 'password': self._senha})
+            if resp.status_code != 302 or '/dashboard' not in resp.headers.get('Location', ''):
+                raise RuntimeError(f'falha no login de {representante}')
+            self._logados[representante] = cliente
+        return cliente
+
+    @staticmethod
+    def _verificar(cliente, resp):
+        if resp.status_code >= 400:
+            raise RuntimeError(f'HTTP {resp.status_code}')
+        # Erros das rotas são reportados apenas via flash; lemos e limpamos da sessão.
+        with cliente.session_transaction() as sessao:
+            flashes = sessao.pop('_flashes', [])
+        for categoria, mensagem in flashes:
+            if categoria == 'danger':
+                raise RuntimeError(mensagem)
+
+    def registrar(self, tarefa):
+        resp = self._publico.post('/registrar', data={
+            'nome': tarefa['nome'], 'email': tarefa['email'], 'telefone': tarefa['telefone'],
+            'representante_email': tarefa['representante'],
+        })
+        self._verificar(self._publico, resp)
+
+    def editar(self, tarefa):
+        cliente = self._cliente(tarefa['representante'])
+        resp = cliente.post('/representado/edit', data={
+            'aluno_id': tarefa['aluno_id'], 'edit-telefone': tarefa['telefone'],
+        })
+        self._verificar(cliente, resp)
+
+
+def ler_flashes(valor_cookie: str) -> list:
+    """Extrai as mensagens flash de um cookie de sessão do Flask, sem verificar a assinatura.
+
+    O payload é JSON (com as tags do Flask) em base64, comprimido com zlib quando começa com '.'.
+    """
+    if not valor_cookie:
+        return []
+    import zlib
+    from flask.json.tag import TaggedJSONSerializer
+    from itsdangerous import base64_decode
+
+    comprimido = valor_cookie.startswith('.')
+    dados = base64_decode(valor_cookie.lstrip('.').split('.')[0])
+    if comprimido:
+        dados = zlib.decompress(dados)
+    return TaggedJSONSerializer().loads(dados.decode('utf-8')).get('_flashes', [])
+
+
+class _ExecutorHTTP:
+    """Executor HTTP. As rotas reportam erros via flash com status 302, então os flashes são lidos
+    do cookie de sessão devolvido em cada resposta."""
+
+    def __init__(self, args):
+        import requests
+
+        self._requests = requests
+        self._url = args.url.rstrip('/')
+        self._senha = args.senha
+        self._logados = {}
+
+    def _cookie_de_login(self, representante):
+        # Cookie de sessão logo após o login (sem flashes). É reenviado em cada edição para que
+        # os flashes de uma resposta não se acumulem nas seguintes.
+        cookie = self._logados.get(representante)
+        if cookie is None:
+            resp = self._requests.post(f'{self._url}/login', allow_redirects=False,
+                                       data={'email': representante, 'password': self._senha})
+            cookie = resp.cookies.get('session')
+            if resp.status_code != 302 or '/dashboard' not in resp.headers.get('Location', '') or not cookie:
+                raise RuntimeError(f'falha no login de {representante}')
+            self._logados[representante] = cookie
+        return cookie
+
+    @staticmethod
+    def _verificar(resp):
+        if resp.status_code >= 400:
+            raise RuntimeError(f'HTTP {resp.status_code}')
+        for categoria, mensagem in ler_flashes(resp.cookies.get('session')):
+            if categoria == 'danger':
+                raise RuntimeError(mensagem)
+
+    def registrar(self, tarefa):
+        # Cada auto-cadastro vem de um navegador diferente: sessão nova, sem flashes anteriores.
+        resp = self._requests.post(f'{self._url}/registrar', allow_redirects=False, data={
+            'nome': tarefa['nome'], 'email': tarefa['email'], 'telefone': tarefa['telefone'],
+            'representante_email': tarefa['representante'],
+        })
+        self._verificar(resp)
+
+    def editar(self, tarefa):
+        resp = self._requests.post(
+            f'{self._url}/representado/edit', allow_redirects=False,
+            cookies={'session': self._cookie_de_login(tarefa['representante'])},
+            data={'aluno_id': tarefa['aluno_id'], 'edit-telefone': tarefa['telefone']})
+        self._verificar(resp)
+
+
+EXECUTORES = {'repo': _ExecutorRepo, 'wsgi': _ExecutorWSGI, 'http': _ExecutorHTTP}
+
+
+def _processo_de_carga(args, tarefas, largada, resultados):
+    """Corpo de cada processo: prepara o executor, espera a largada e dispara as tarefas."""
+    executor = EXECUTORES[args.modo](args)
+    largada.wait()
+    registros = []
+    for tarefa in tarefas:
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            getattr(executor, tarefa['op'])(tarefa)
+        except Exception as e:
+            erro = f'{type(e).__name__}: {e}'
+        registros.append({
+            'op': tarefa['op'],
+            'chave': tarefa['email'] if tarefa['op'] == 'registrar' else tarefa['aluno_id'],
+            'telefone': tarefa['telefone'],
+            'latencia_ms': (time.perf_counter() - inicio) * 1000,
+            'erro': erro,
+        })
+    resultados.put(registros)
+
+
+# --- Planejamento e verificação ---
+
+def planejar_tarefas(db: str, registros: int, edicoes: int, alvos: int, rodada: str) -> list:
+    """Monta a lista de tarefas. Cada edição atinge um aluno diferente para que o valor final seja verificável."""
+    from controle_db import JSONRepository
+
+    dados = JSONRepository(db).load()
+    reps = dados.get('representantes', [])[:alvos]
+    if not reps:
+        raise SystemExit('o banco não tem representantes para receber a carga')
+    tarefas = []
+    for i in range(registros):
+        rep = reps[i % len(reps)]
+        tarefas.append({
+            'op': 'registrar', 'representante': rep['email'], 'nome': f'carga {i}',
+            'email': f'carga.{rodada}.{i}@carga.representa', 'telefone': f'{i:08d}',
+        })
+    editaveis = [(rep['email'], a['id']) for rep in reps for a in rep.get('alunos', [])]
+    if edicoes > len(editaveis):
+        print(f'Aviso: apenas {len(editaveis)} alunos disponíveis para edição.', file=sys.stderr)
+    for i, (rep_email, aluno_id) in enumerate(editaveis[:edicoes]):
+        tarefas.append({
+            'op': 'editar', 'representante': rep_email, 'aluno_id': aluno_id,
+            'email': None, 'telefone': f'edit-{rodada}-{i}',
+        })
+    return tarefas
+
+
+def verificar_integridade(db: str, registros: list) -> dict:
+    """Confere o estado final do banco contra o que cada requisição bem-sucedida deveria ter gravado."""
+    from controle_db import JSONRepository
+
+    dados = JSONRepository(db).load()
+    emails = Counter()
+    telefones = {}
+    ids = Counter()
+    for rep in dados.get('representantes', []):
+        ids[rep.get('id')] += 1
+        for aluno in rep.get('alunos', []):
+            ids[aluno.get('id')] += 1
+            emails[aluno.get('email')] += 1
+            telefones[aluno.get('id')] = aluno.get('telefone')
+
+    registros_perdidos = registros_duplicados = edicoes_perdidas = 0
+    for r in registros:
+        if r['erro'] is not None:
+            continue
+        if r['op'] == 'registrar':
+            vezes = emails.get(r['chave'], 0)
+            registros_perdidos += vezes == 0
+            registros_duplicados += vezes > 1
+        elif telefones.get(r['chave']) != r['telefone']:
+            edicoes_perdidas += 1
+
+    numeros = [int(m.group(1)) for i in ids if i and (m := re.fullmatch(r'[ra](\d+)', i))]
+    return {
+        'registros_perdidos': registros_perdidos,
+        'registros_duplicados': registros_duplicados,
+        'edicoes_perdidas': edicoes_perdidas,
+        'ids_colididos': sorted(i for i, n in ids.items() if n > 1),
+        'next_id_consistente': dados.get('next_id', 1) > max(numeros, default=0),
+    }
+
+
+def resumir(registros: list, duracao: float) -> dict:
+    por_op = {}
+    for op in sorted({r['op'] for r in registros}):
+        do_op = [r for r in registros if r['op'] == op]
+        latencias = [r['latencia_ms'] for r in do_op]
+        erros = [r['erro'] for r in do_op if r['erro'] is not None]
+        por_op[op] = {
+            'total': len(do_op),
+            'sucesso': len(do_op) - len(erros),
+            'erros': len(erros),
+            'timeouts_lock': sum(MENSAGEM_TIMEOUT_LOCK in e for e in erros),
+            'p50_ms': round(percentil(latencias, 50), 3),
+            'p95_ms': round(percentil(latencias, 95), 3),
+            'p99_ms': round(percentil(latencias, 99), 3),
+            'exemplos_de_erro': sorted(set(erros))[:5],
+        }
+    return {
+        'duracao_s': round(duracao, 3),
+        'vazao_req_s': round(len(registros) / duracao, 2) if duracao else 0.0,
+        'operacoes': por_op,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Gerador de carga concorrente para /registrar e edições.')
+    parser.add_argument('--modo', choices=sorted(EXECUTORES), default='wsgi')
+    parser.add_argument('--processos', type=int, default=4)
+    parser.add_argument('--registros', type=int, default=200, help='total de auto-cadastros')
+    parser.add_argument('--edicoes', type=int, default=40, help='total de edições no dashboard')
+    parser.add_argument('--alvos', type=int, default=1, help='quantos representantes recebem a carga')
+    parser.add_argument('--db', help='banco a usar; se omitido, gera um sintético em diretório temporário')
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena',
+                        help='escala do banco sintético quando --db não é informado')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='servidor alvo no modo http')
+    parser.add_argument('--senha', default=SENHA_PADRAO, help='senha dos representantes alvo')
+    parser.add_argument('--saida', help='grava o relatório em JSON neste caminho')
+    parser.add_argument('--manter-limites', action='store_true',
+                        help='no modo wsgi, mantém os limites de taxa do /registrar (recusas contam como erro)')
+    args = parser.parse_args(argv)
+
+    temporario = None
+    if args.db is None:
+        if args.modo == 'http':
+            parser.error('no modo http informe --db com o banco usado pelo servidor')
+        temporario = tempfile.mkdtemp(prefix='representa-carga-')
+        args.db = os.path.join(temporario, 'db.json')
+        gerar_arquivo(args.escala, args.db)
+    try:
+        rodada = str(int(time.time() * 1000))
+        tarefas = planejar_tarefas(args.db, args.registros, args.edicoes, args.alvos, rodada)
+        fatias = [tarefas[i::args.processos] for i in range(args.processos)]
+
+        # 'spawn' garante processos independentes, como workers de um servidor WSGI.
+        contexto = multiprocessing.get_context('spawn')
+        largada = contexto.Barrier(args.processos + 1)
+        resultados = contexto.Queue()
+        processos = [contexto.Process(target=_processo_de_carga, args=(args, fatia, largada, resultados))
+                     for fatia in fatias]
+        for p in processos:
+            p.start()
+        largada.wait()
+        inicio = time.perf_counter()
+        registros = []
+        for _ in processos:
+            registros.extend(resultados.get())
+        duracao = time.perf_counter() - inicio
+        for p in processos:
+            p.join()
+
+        relatorio = {
+            'configuracao': {
+                'modo': args.modo, 'processos': args.processos, 'registros': args.registros,
+                'edicoes': args.edicoes, 'alvos': args.alvos, 'db': None if temporario else args.db,
+                'escala': args.escala if temporario else None,
+            },
+            **resumir(registros, duracao),
+            'integridade': verificar_integridade(args.db, registros),
+        }
+    finally:
+        if temporario:
+            shutil.rmtree(temporario, ignore_errors=True)
+
+    print(json.dumps(relatorio, ensure_ascii=False, indent=2))
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Geração de bancos `db.json` sintéticos para benchmarks.
+
+Produz arquivos com o mesmo formato que `JSONRepository` grava (mesmos campos, mesmos
+formatos de data "dd/mm/YYYY HH:MM:SS"), em várias escalas de representantes, alunos e
+histórico de mensagens. A geração é determinística para uma mesma semente.
+
+Uso:
+    python -m benchmarks.dados_sinteticos media /tmp/db_media.json
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import sys
+from datetime import datetime, timedelta
+
+from controle_db import JSONRepository
+
+FORMATO_DATA = "%d/%m/%Y %H:%M:%S"
+
+# Senha em texto claro usada por todos os representantes sintéticos (para o login nas rotas).
+SENHA_PADRAO = 'senha-benchmark'
+
+# nome da escala -> (representantes, alunos por representante, mensagens por representante)
+ESCALAS = {
+    'minima': (10, 10, 10),
+    'pequena': (100, 50, 50),
+    'media': (1000, 100, 200),
+    'muitos_representantes': (10000, 10, 20),
+    'turma_grande': (10, 5000, 5000),
+}
+
+ESCALAS_PADRAO = ('minima', 'pequena', 'media')
+
+DIAS_DE_HISTORICO = 90
+
+
+def email_representante(indice: int) -> str:
+    return f"rep{indice}@bench.representa"
+
+
+def email_aluno(indice_rep: int, indice: int) -> str:
+    return f"aluno{indice_rep}.{indice}@bench.representa"
+
+
+def gerar_dados(representantes: int, alunos: int, mensagens: int, semente: int = 42) -> dict:
+    """Monta em memória um documento no formato de `db.json`."""
+    rnd = random.Random(semente)
+    agora = datetime.now()
+    inicio = agora - timedelta(days=DIAS_DE_HISTORICO)
+    janela = int((agora - inicio).total_seconds())
+    senha_hash = hashlib.sha256(SENHA_PADRAO.encode()).hexdigest()
+
+    def data_aleatoria() -> str:
+        return (inicio + timedelta(seconds=rnd.randrange(janela))).strftime(FORMATO_DATA)
+
+    next_id = 1
+    reps = []
+    for i in range(representantes):
+        rep = {
+            'id': f"r{next_id}",
+            'nome': f"representante {i}",
+            'email': email_representante(i),
+            'telefone': f"8299{i:07d}",
+            'senha': senha_hash,
+            'alunos': [],
+            'mensagens': [],
+            'metadata': {'created_at': inicio.strftime(FORMATO_DATA)},
+        }
+        next_id += 1
+        for j in range(alunos):
+            rep['alunos'].append({
+                'id': f"a{next_id}",
+                'nome': f"aluno {i}.{j}",
+                'email': email_aluno(i, j),
+                'telefone': f"8198{j:07d}",
+                'data_adicionado': data_aleatoria(),
+            })
+            next_id += 1
+        datas = sorted((data_aleatoria() for _ in range(mensagens)),
+                       key=lambda d: datetime.strptime(d, FORMATO_DATA))
+        for k, data in enumerate(datas):
+            rep['mensagens'].append({
+                'assunto': f"Aviso {k}",
+                'corpo': f"Pessoal, lembrete número {k} da turma {i}. " * 3,
+                'data': data,
+            })
+        reps.append(rep)
+    return {'representantes': reps, 'next_id': next_id}
+
+
+def gerar_arquivo(escala: str, caminho: str, semente: int = 42) -> dict:
+    """Gera o banco da escala dada em `caminho` e retorna um resumo do que foi escrito."""
+    representantes, alunos, mensagens = ESCALAS[escala]
+    dados = gerar_dados(representantes, alunos, mensagens, semente=semente)
+    JSONRepository(caminho).save(dados)
+    return {
+        'escala': escala,
+        'representantes': representantes,
+        'alunos_por_representante': alunos,
+        'mensagens_por_representante': mensagens,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Gera um db.json sintético.')
+    parser.add_argument('escala', choices=sorted(ESCALAS))
+    parser.add_argument('caminho')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args(argv)
+    print(gerar_arquivo(args.escala, args.caminho, semente=args.semente))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,12 +6,28 @@ Esta classe fornece operações simples de carga/salvamento atômico e auxiliare
 Notas:
 - Usa um bloqueio de arquivo para evitar corrupção por escrita simultânea (requer filelock).
 - As escritas são atômicas (escreve em arquivo temporário depois os.replace).
+- As leituras usam o documento já carregado e indexado por email em memória, revalidado a cada
+  chamada pelo `stat` do arquivo e por um contador de gerações em `<path>.geracao`, incrementado
+  a cada `save()`; `preaquecer()` faz essa carga no boot em vez de na primeira requisição.
+- Mantém uma projeção pré-computada e versionada do diretório de representantes (id, nome e
+  email) em `<path>.diretorio.json`, atualizada apenas quando um representante é adicionado.
+- Cada alteração de alunos/mensagens publica um evento no feed `<path>.eventos/`, um arquivo
+  NDJSON append-only por representante, lido por qualquer processo (ver `FeedDeEventos`).
+- O histórico de mensagens fica em um arquivo append-only particionado por representante e mês
+  (`<path>.arquivo/<rep_id>/<YYYY-MM>.ndjson`). O documento principal guarda apenas contadores
+  e as últimas `MENSAGENS_RECENTES` mensagens; o restante é lido sob demanda, com paginação.
+- Snapshots online e comprimidos ficam em `<path>.snapshots/` (ver `GerenciadorDeSnapshots`).
 """
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
 import os
+import re
+import shutil
 import tempfile
+import time
 from datetime import datetime
 from typing import Optional
 
@@ -20,11 +36,197 @@ try:
 except Exception:  # pragma: no cover - dependência opcional
     FileLock = None  # type: ignore
 
+try:
+    import zstandard
+except Exception:  # pragma: no cover - dependência opcional
+    zstandard = None  # type: ignore
+
+# Quantas mensagens ficam no documento principal (o dashboard mostra apenas as mais recentes)
+MENSAGENS_RECENTES = 20
+
+# Partição das mensagens sem `data` legível (históricos antigos); ordena antes de qualquer mês
+PARTICAO_SEM_DATA = '0000-00'
+
+
+def _append_ndjson(caminho: str, registro: dict) -> int:
+    """Acrescenta `registro` como uma linha JSON com O_APPEND e retorna o tamanho final do arquivo."""
+    linha = (json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8')
+    fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, linha)
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+class FeedDeEventos:
+    """Feed de alterações por representante, compartilhado entre processos via arquivos.
+
+    Cada representante tem um arquivo NDJSON append-only em `diretorio/<rep_id>.ndjson` com
+    linhas `{"versao", "tipo", "dados", "data"}`. Os escritores publicam com o lock do
+    repositório adquirido, então a ordem das linhas segue a versão de dados do representante.
+    Leitores (workers do Flask ou o servidor SSE dedicado) acompanham o arquivo por posição
+    `(geração, inode, offset)`. A compactação regrava o arquivo e incrementa a geração em
+    `<rep_id>.geracao` (inode e tamanho sozinhos se repetem entre regravações); ao ver outra
+    geração, o leitor relê desde o início e reposiciona pela versão.
+    """
+
+    _ID_VALIDO = re.compile(r'^[A-Za-z0-9_-]+$')
+
+    def __init__(self, diretorio: str, max_bytes: int = 256 * 1024, manter: int = 500):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.manter = manter
+
+    def _arquivo(self, rep_id: str) -> str:
+        if not rep_id or not self._ID_VALIDO.match(rep_id):
+            raise ValueError(f'invalid representante id: {rep_id!r}')
+        return os.path.join(self.diretorio, f'{rep_id}.ndjson')
+
+    def _arquivo_geracao(self, rep_id: str) -> str:
+        return os.path.join(self.diretorio, f'{rep_id}.geracao')
+
+    def _ler_geracao(self, rep_id: str) -> int:
+        try:
+            with open(self._arquivo_geracao(rep_id), 'r', encoding='utf-8') as f:
+                return int(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def publicar(self, rep_id: str, versao: int, tipo: str, dados) -> dict:
+        """Acrescenta um evento ao feed do representante. Chamar com o lock do repositório adquirido."""
+        evento = {
+            'versao': versao,
+            'tipo': tipo,
+            'dados': dados,
+            'data': datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        }
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self._arquivo(rep_id)
+        if _append_ndjson(caminho, evento) > self.max_bytes:
+            self._compactar(rep_id, caminho)
+        return evento
+
+    def _compactar(self, rep_id: str, caminho: str) -> None:
+        """Mantém os últimos eventos (até `manter` linhas e metade de `max_bytes`), trocando o arquivo
+        atomicamente e incrementando a geração.
+
+        O limite em bytes garante que a próxima compactação só ocorra depois de outros
+        `max_bytes / 2` bytes publicados, em vez de a cada publicação. A última linha é sempre mantida.
+        """
+        with open(caminho, 'rb') as f:
+            linhas = f.readlines()[-self.manter:]
+        tamanho = 0
+        inicio = len(linhas)
+        while inicio > 0 and (inicio == len(linhas) or tamanho + len(linhas[inicio - 1]) <= self.max_bytes // 2):
+            inicio -= 1
+            tamanho += len(linhas[inicio])
+        linhas = linhas[inicio:]
+        fd, tmp = tempfile.mkstemp(dir=self.diretorio)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.writelines(linhas)
+            os.replace(tmp, caminho)
+            # Depois da troca: quem leu a geração antiga e o arquivo novo relê tudo na próxima vez.
+            JSONRepository._write_atomic(self._arquivo_geracao(rep_id), self._ler_geracao(rep_id) + 1)
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
+
+    def ler(self, rep_id: str, posicao: Optional[tuple] = None) -> tuple[list[dict], tuple]:
+        """Lê os eventos escritos após `posicao` e retorna `(eventos, nova_posicao)`.
+
+        Sem posição (ou se o arquivo foi compactado desde então) lê desde o início.
+        Linhas ainda incompletas ficam para a próxima leitura.
+        """
+        caminho = self._arquivo(rep_id)
+        # A geração é lida antes do arquivo: uma compactação concorrente muda a geração depois.
+        geracao = self._ler_geracao(rep_id)
+        try:
+            f = open(caminho, 'rb')
+        except FileNotFoundError:
+            return [], (geracao, None, 0)
+        with f:
+            st = os.fstat(f.fileno())
+            offset = 0
+            if posicao is not None and posicao[:2] == (geracao, st.st_ino) and posicao[2] <= st.st_size:
+                offset = posicao[2]
+            if offset == st.st_size:
+                return [], (geracao, st.st_ino, offset)
+            f.seek(offset)
+            bloco = f.read(st.st_size - offset)
+        completo = bloco[:bloco.rfind(b'\n') + 1]
+        eventos = [json.loads(l) for l in completo.splitlines() if l.strip()]
+        return eventos, (geracao, st.st_ino, offset + len(completo))
+
+    def mudou(self, rep_id: str, posicao: tuple) -> bool:
+        """Verificação barata (a geração e um `stat`) de que há algo novo após `posicao`."""
+        if posicao is None:
+            return True
+        try:
+            st = os.stat(self._arquivo(rep_id))
+        except FileNotFoundError:
+            return False
+        return (self._ler_geracao(rep_id), st.st_ino, st.st_size) != posicao
+
+    @staticmethod
+    def eventos_apos(eventos: list[dict], desde: int) -> list[dict]:
+        """Filtra eventos com versão maior que `desde`.
+
+        Se o feed já foi compactado e não cobre a lacuna, retorna um único evento 'ressincronizar'.
+        """
+        novos = [e for e in eventos if e.get('versao', 0) > desde]
+        if novos and novos[0]['versao'] > desde + 1:
+            return [{'versao': novos[-1]['versao'], 'tipo': 'ressincronizar', 'dados': None}]
+        return novos
+
+    def seguir(self, rep_id: str, desde: int = 0, intervalo: float = 1.0, heartbeat: float = 15.0,
+               duracao_max: Optional[float] = None):
+        """Gerador que produz eventos com versão maior que `desde` conforme são publicados.
+
+        Produz `None` a cada `heartbeat` segundos sem eventos (para manter a conexão viva) e
+        termina após `duracao_max` segundos, se informado. Se o feed não tiver mais eventos
+        antigos o suficiente para cobrir a lacuna desde `desde`, produz um evento 'ressincronizar'.
+        """
+        inicio = ultimo_envio = time.monotonic()
+        posicao = None
+        ultima = desde
+        while duracao_max is None or time.monotonic() - inicio < duracao_max:
+            if posicao is None or self.mudou(rep_id, posicao):
+                try:
+                    eventos, posicao = self.ler(rep_id, posicao)
+                except (OSError, ValueError):
+                    # Leitura inconsistente: relê desde o início na próxima volta.
+                    eventos, posicao = [], None
+                novos = self.eventos_apos(eventos, ultima)
+                for evento in novos:
+                    ultima = evento['versao']
+                    yield evento
+                if novos:
+                    ultimo_envio = time.monotonic()
+            if time.monotonic() - ultimo_envio >= heartbeat:
+                ultimo_envio = time.monotonic()
+                yield None
+            time.sleep(intervalo)
+
 
 class JSONRepository:
     def __init__(self, path: str = 'representados.json'):
         self.path = path
         self.lock_path = f'{path}.lock'
+        self.eventos = FeedDeEventos(f'{path}.eventos')
+        self.arquivo_path = f'{path}.arquivo'
+        self.diretorio_path = f'{path}.diretorio.json'
+        # (chave de stat do arquivo, conteúdo) da última leitura do diretório
+        self._diretorio_cache = None
+        # Contador incrementado a cada save(): inode, mtime e tamanho sozinhos podem se repetir
+        # (inodes reaproveitados pelo os.replace e escritas no mesmo tick do relógio).
+        self.geracao_path = f'{path}.geracao'
+        # (geração + stat, documento, índice email -> representante) da última leitura do banco
+        self._documento_cache = None
 
     def _ensure_file(self) -> None:
         if not os.path.exists(self.path):
@@ -43,17 +245,66 @@ class JSONRepository:
         with open(self.path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
+    def _load_cached(self) -> tuple[dict, dict]:
+        """Retorna `(documento, índice email -> representante)` da última leitura em memória.
+
+        Usado apenas pelos caminhos de leitura: o documento só é relido e reindexado quando a
+        geração ou o stat do arquivo mudam (o que cobre escritas feitas por outros processos).
+        O resultado é compartilhado entre chamadas e NÃO deve ser alterado;
+        as mutações continuam partindo de um `load()` novo sob o lock.
+        """
+        self._ensure_file()
+        # Geração e stat são lidos antes do documento: o conteúdo carregado é sempre ao menos tão
+        # novo quanto a chave, e qualquer save() posterior muda a geração.
+        geracao = self._ler_geracao()
+        st = os.stat(self.path)
+        chave = (geracao, st.st_ino, st.st_mtime_ns, st.st_size)
+        cache = self._documento_cache
+        if cache is None or cache[0] != chave:
+            cache = self._indexar(chave, self.load())
+        return cache[1], cache[2]
+
+    def _indexar(self, chave: tuple, data: dict) -> tuple:
+        indice = {(r.get('email') or '').lower(): r for r in data.get('representantes', [])}
+        self._documento_cache = (chave, data, indice)
+        return self._documento_cache
+
+    def preaquecer(self) -> None:
+        """Carrega e indexa o banco e o diretório antecipadamente (ex: no boot do worker)."""
+        self._load_cached()
+        self.get_diretorio()
+
     def save(self, data: dict) -> None:
         """Salva dados atomicamente.
 
         Escreve em um arquivo temporário e depois usa os.replace para evitar escritas parciais.
+        O documento gravado passa a ser o cache de leitura deste processo, então `data` não deve
+        ser alterado depois de salvo.
         """
-        dirn = os.path.dirname(self.path) or '.'
+        st = self._write_atomic(self.path, data, indent=2)
+        geracao = self._ler_geracao() + 1
+        self._write_atomic(self.geracao_path, geracao)
+        self._indexar((geracao, st.st_ino, st.st_mtime_ns, st.st_size), data)
+
+    def _ler_geracao(self) -> int:
+        try:
+            with open(self.geracao_path, 'r', encoding='utf-8') as f:
+                return int(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    @staticmethod
+    def _write_atomic(path: str, data: dict, indent: Optional[int] = None) -> os.stat_result:
+        """Grava atomicamente e retorna o stat do arquivo gravado (tomado antes do os.replace)."""
+        dirn = os.path.dirname(path) or '.'
         fd, tmp = tempfile.mkstemp(dir=dirn)
         try:
             with os.fdopen(fd, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            os.replace(tmp, self.path)
+                json.dump(data, f, ensure_ascii=False, indent=indent)
+                f.flush()
+                st = os.fstat(f.fileno())
+            os.replace(tmp, path)
+            return st
         finally:
             if os.path.exists(tmp):
                 try:
@@ -61,14 +312,57 @@ class JSONRepository:
                 except Exception:
                     pass
 
+    # --- Diretório de representantes ---
+    def _save_diretorio(self, data: dict) -> dict:
+        """Regrava a projeção do diretório a partir do documento completo. Chamar com o lock adquirido.
+
+        A versão é o `next_id` corrente: cresce monotonicamente mesmo se o diretório for reconstruído.
+        """
+        diretorio = {
+            'versao': data.get('next_id', 1),
+            'representantes': [
+                {'id': r.get('id'), 'nome': r.get('nome'), 'email': r.get('email')}
+                for r in data.get('representantes', [])
+            ],
+        }
+        self._write_atomic(self.diretorio_path, diretorio)
+        return diretorio
+
+    def _rebuild_diretorio(self) -> dict:
+        lock = self._acquire_lock()
+        if lock:
+            lock.acquire()
+        try:
+            return self._save_diretorio(self.load())
+        finally:
+            if lock:
+                lock.release()
+
+    def get_diretorio(self) -> dict:
+        """Retorna o diretório `{'versao', 'representantes': [{id, nome, email}]}` sem ler o banco completo.
+
+        O conteúdo fica em memória e só é relido quando o arquivo da projeção muda em disco
+        (o que também cobre atualizações feitas por outros processos).
+        """
+        try:
+            st = os.stat(self.diretorio_path)
+        except FileNotFoundError:
+            # Bancos criados antes da projeção existir: reconstrói a partir do documento completo.
+            self._rebuild_diretorio()
+            st = os.stat(self.diretorio_path)
+        chave = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cache = self._diretorio_cache
+        if cache is None or cache[0] != chave:
+            with open(self.diretorio_path, 'r', encoding='utf-8') as f:
+                cache = (chave, json.load(f))
+            self._diretorio_cache = cache
+        return cache[1]
+
     # --- Operações do Repositório ---
     def get_representante_by_email(self, email: str) -> Optional[dict]:
-        data = self.load()
-        email = email.lower() if email else email
-        for r in data.get('representantes', []):
-            if r.get('email', '').lower() == email:
-                return r
-        return None
+        """Busca pelo índice em memória. O dict retornado é compartilhado: não alterar."""
+        _, indice = self._load_cached()
+        return indice.get((email or '').lower())
 
     def add_representante(self, nome: str, email: str, telefone: Optional[str] = None, senha: Optional[str] = None, mensagens: Optional[list] = None) -> dict:
         """Adiciona um novo representante e retorna o dicionário criado."""
@@ -95,166 +389,613 @@ class JSONRepository:
             }
             data.setdefault('representantes', []).append(rep)
             self.save(data)
+            self._save_diretorio(data)
             return rep
         finally:
             if lock:
                 lock.release()
 
-    def add_aluno(self, representante_email: str, nome: str, email: Optional[str] = None, telefone: Optional[str] = None) -> dict:
-        """Anexa um aluno ao representante identificado por email. Retorna o dicionário do aluno."""
+    def _find_representante(self, data: dict, representante_email: str) -> Optional[dict]:
+        for r in data.get('representantes', []):
+            if r.get('email', '').lower() == representante_email.lower():
+                return r
+        return None
+
+    def _mutate_representante(self, representante_email: str, mutate, evento=None):
+        """Aplica `mutate(data, rep)` ao representante sob lock e salva o resultado.
+
+        `mutate` retorna `(resultado, alterou)`. Quando algo foi alterado, a versão de dados do
+        representante (`rep['versao']`) é incrementada antes de salvar e, se `evento` for dado,
+        `evento(resultado)` → `(tipo, dados)` é publicado no feed. Retorna `(resultado, versao)`.
+        """
         lock = self._acquire_lock()
         if lock:
             lock.acquire()
         try:
             data = self.load()
-            rep = None
-            for r in data.get('representantes', []):
-                if r.get('email', '').lower() == representante_email.lower():
-                    rep = r
-                    break
+            rep = self._find_representante(data, representante_email)
             if rep is None:
                 raise KeyError('representante not found')
 
+            resultado, alterou = mutate(data, rep)
+            if alterou:
+                rep['versao'] = rep.get('versao', 0) + 1
+                self.save(data)
+                if evento is not None:
+                    tipo, dados = evento(resultado)
+                    self.eventos.publicar(rep.get('id'), rep['versao'], tipo, dados)
+            return resultado, rep.get('versao', 0)
+        finally:
+            if lock:
+                lock.release()
+
+    def aplicar_alteracao_aluno(self, representante_email: str, acao: str, aluno_id: Optional[str] = None, campos: Optional[dict] = None, unico: bool = False) -> tuple[Optional[dict], int]:
+        """Cria, atualiza ou remove um aluno e retorna `(aluno, versao)`.
+
+        `acao` é 'criar', 'atualizar' ou 'remover'. Em 'remover' o aluno retornado é o registro
+        removido, ou None se não existia. `versao` é a versão de dados do representante após a operação.
+        Com `unico`, 'criar' levanta ValueError se o representante já tiver um aluno com o mesmo email.
+        """
+        campos = campos or {}
+
+        def criar(data, rep):
+            if unico and campos.get('email'):
+                email = campos['email'].lower()
+                if any((a.get('email') or '').lower() == email for a in rep.get('alunos', [])):
+                    raise ValueError('aluno already exists')
             aid = f"a{data.get('next_id', 1)}"
             data['next_id'] = data.get('next_id', 1) + 1
+            nome = campos.get('nome')
+            email = campos.get('email')
             aluno = {
                 'id': aid,
                 'nome': nome.lower() if isinstance(nome, str) else nome,
                 'email': email.lower() if isinstance(email, str) and email else None,
-                'telefone': telefone,
+                'telefone': campos.get('telefone'),
                 'data_adicionado': datetime.now().strftime("%d/%m/%Y %H:%M:%S")
             }
             rep.setdefault('alunos', []).append(aluno)
-            self.save(data)
-            return aluno
-        finally:
-            if lock:
-                lock.release()
+            return aluno, True
+
+        def atualizar(data, rep):
+            for a in rep.setdefault('alunos', []):
+                if a.get('id') == aluno_id:
+                    # Permitir apenas atualização de campos conhecidos; sem mudança, nada é gravado
+                    alterou = False
+                    for k, v in campos.items():
+                        if k in ('nome', 'email', 'telefone'):
+                            v = v.lower() if isinstance(v, str) and k in ('nome','email') else v
+                            alterou = alterou or a.get(k) != v
+                            a[k] = v
+                    return a, alterou
+            raise KeyError('aluno not found')
+
+        def remover(data, rep):
+            alunos = rep.get('alunos', [])
+            for i, a in enumerate(alunos):
+                if a.get('id') == aluno_id:
+                    del alunos[i]
+                    return a, True
+            return None, False
+
+        operacoes = {
+            'criar': (criar, lambda a: ('aluno_criado', a)),
+            'atualizar': (atualizar, lambda a: ('aluno_atualizado', a)),
+            'remover': (remover, lambda a: ('aluno_removido', {'id': a.get('id')})),
+        }
+        if acao not in operacoes:
+            raise ValueError(f'invalid action: {acao}')
+        mutate, evento = operacoes[acao]
+        return self._mutate_representante(representante_email, mutate, evento)
+
+    def add_aluno(self, representante_email: str, nome: str, email: Optional[str] = None, telefone: Optional[str] = None, unico: bool = False) -> dict:
+        """Anexa um aluno ao representante identificado por email. Retorna o dicionário do aluno."""
+        campos = {'nome': nome, 'email': email, 'telefone': telefone}
+        return self.aplicar_alteracao_aluno(representante_email, 'criar', campos=campos, unico=unico)[0]
 
     def remove_aluno(self, representante_email: str, aluno_email: str) -> bool:
         """Remove um aluno por email do representante dado. Retorna True se removido."""
-        lock = self._acquire_lock()
-        if lock:
-            lock.acquire()
-        try:
-            data = self.load()
-            rep = None
-            for r in data.get('representantes', []):
-                if r.get('email', '').lower() == representante_email.lower():
-                    rep = r
-                    break
-            if rep is None:
-                raise KeyError('representante not found')
-
+        def remover(data, rep):
             alunos = rep.get('alunos', [])
             for i, a in enumerate(alunos):
                 if a.get('email', '').lower() == aluno_email.lower():
                     del alunos[i]
-                    self.save(data)
-                    return True
-            return False
-        finally:
-            if lock:
-                lock.release()
+                    return a, True
+            return None, False
+
+        evento = lambda a: ('aluno_removido', {'id': a.get('id')})
+        return self._mutate_representante(representante_email, remover, evento)[0] is not None
         
     def check_aluno_exists(self, representante_email: str, aluno_email: str) -> bool:
         """Verifica se um aluno com o email dado existe sob o representante."""
-        data = self.load()
-        for r in data.get('representantes', []):
-            if r.get('email', '').lower() == representante_email.lower():
-                for a in r.get('alunos', []):
-                    if a.get('email', '').lower() == aluno_email.lower():
-                        return True
-        return False
+        rep = self.get_representante_by_email(representante_email)
+        if rep is None:
+            return False
+        aluno_email = (aluno_email or '').lower()
+        return any((a.get('email') or '').lower() == aluno_email for a in rep.get('alunos', []))
     
     def get_alunos_of_representante(self, representante_email: str) -> list[dict]:
         """Retorna lista de alunos para o email do representante dado."""
-        data = self.load()
-        for r in data.get('representantes', []):
-            if r.get('email', '').lower() == representante_email.lower():
-                return r.get('alunos', [])
-        return []
+        rep = self.get_representante_by_email(representante_email)
+        return list(rep.get('alunos', [])) if rep is not None else []
+
+    def iter_alunos_of_representante(self, representante_email: str):
+        """Gera os alunos do representante um a um (para exportações em streaming).
+
+        O `db.json` não é incrementalmente legível, então usa o documento em memória;
+        o gerador evita apenas materializar cópias e a saída completa.
+        """
+        rep = self.get_representante_by_email(representante_email)
+        if rep is not None:
+            yield from rep.get('alunos', [])
 
     def update_aluno(self, representante_email: str, aluno_id: str, updates: dict) -> dict:
         """Atualiza um aluno por id para o representante dado e retorna o aluno atualizado."""
+        return self.aplicar_alteracao_aluno(representante_email, 'atualizar', aluno_id, updates)[0]
+
+    def remove_aluno_by_id(self, representante_email: str, aluno_id: str) -> bool:
+        """Remove um aluno por id. Retorna True se removido."""
+        return self.aplicar_alteracao_aluno(representante_email, 'remover', aluno_id)[0] is not None
+
+    # --- Arquivo de mensagens ---
+    def _arquivo_representante(self, rep_id: str) -> str:
+        if not rep_id or not FeedDeEventos._ID_VALIDO.match(rep_id):
+            raise ValueError(f'invalid representante id: {rep_id!r}')
+        return os.path.join(self.arquivo_path, rep_id)
+
+    @staticmethod
+    def _mes_da_mensagem(mensagem: dict) -> str:
+        """Partição `YYYY-MM` da mensagem; sem data legível, `PARTICAO_SEM_DATA` (a mais antiga)."""
+        try:
+            return datetime.strptime(mensagem.get('data') or '', "%d/%m/%Y %H:%M:%S").strftime('%Y-%m')
+        except ValueError:
+            return PARTICAO_SEM_DATA
+
+    @staticmethod
+    def _contar_mensagem(rep: dict, mensagem: dict) -> None:
+        """Atualiza os contadores de mensagens do representante (total e por dia, usado nos gráficos)."""
+        rep['mensagens_total'] = rep.get('mensagens_total', 0) + 1
+        try:
+            dia = datetime.strptime(mensagem.get('data') or '', "%d/%m/%Y %H:%M:%S").strftime('%Y-%m-%d')
+        except ValueError:
+            return
+        por_dia = rep.setdefault('mensagens_por_dia', {})
+        por_dia[dia] = por_dia.get(dia, 0) + 1
+
+    def _migrar_mensagens(self, rep: dict) -> bool:
+        """Move o histórico inline de um representante para o arquivo. Chamar com o lock adquirido.
+
+        Representantes já migrados têm `mensagens_total`. As partições são regravadas por inteiro
+        (não acrescentadas), então repetir a migração após uma falha não duplica mensagens.
+        Retorna True se o representante foi migrado agora.
+        """
+        if 'mensagens_total' in rep:
+            return False
+        mensagens = rep.get('mensagens', [])
+        por_mes = {}
+        for m in mensagens:
+            por_mes.setdefault(self._mes_da_mensagem(m), []).append(m)
+        diretorio = self._arquivo_representante(rep.get('id'))
+        os.makedirs(diretorio, exist_ok=True)
+        for mes, itens in por_mes.items():
+            caminho = os.path.join(diretorio, f'{mes}.ndjson')
+            fd, tmp = tempfile.mkstemp(dir=diretorio)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    for m in itens:
+                        f.write(json.dumps(m, ensure_ascii=False) + '\n')
+                os.replace(tmp, caminho)
+            finally:
+                if os.path.exists(tmp):
+                    try:
+                        os.remove(tmp)
+                    except Exception:
+                        pass
+        rep['mensagens_total'] = 0
+        rep['mensagens_por_dia'] = {}
+        for m in mensagens:
+            self._contar_mensagem(rep, m)
+        rep['mensagens'] = mensagens[-MENSAGENS_RECENTES:]
+        return True
+
+    def migrar_mensagens_para_arquivo(self) -> int:
+        """Migra o histórico inline de todos os representantes para o arquivo particionado.
+
+        Idempotente: representantes já migrados são ignorados. Retorna quantos foram migrados.
+        """
         lock = self._acquire_lock()
         if lock:
             lock.acquire()
         try:
             data = self.load()
-            rep = None
-            for r in data.get('representantes', []):
-                if r.get('email', '').lower() == representante_email.lower():
-                    rep = r
-                    break
-            if rep is None:
-                raise KeyError('representante not found')
-
-            alunos = rep.setdefault('alunos', [])
-            for a in alunos:
-                if a.get('id') == aluno_id:
-                    # Permitir apenas atualização de campos conhecidos
-                    for k, v in updates.items():
-                        if k in ('nome', 'email', 'telefone'):
-                            a[k] = v.lower() if isinstance(v, str) and k in ('nome','email') else v
-                    self.save(data)
-                    return a
-            raise KeyError('aluno not found')
+            migrados = sum(self._migrar_mensagens(r) for r in data.get('representantes', []))
+            if migrados:
+                self.save(data)
+            return migrados
         finally:
             if lock:
                 lock.release()
 
-    def remove_aluno_by_id(self, representante_email: str, aluno_id: str) -> bool:
-        """Remove um aluno por id. Retorna True se removido."""
+    def adicionar_mensagem(self, representante_email: str, mensagem: dict) -> None:
+        def anexar(data, rep):
+            self._migrar_mensagens(rep)
+            diretorio = self._arquivo_representante(rep.get('id'))
+            os.makedirs(diretorio, exist_ok=True)
+            _append_ndjson(os.path.join(diretorio, f'{self._mes_da_mensagem(mensagem)}.ndjson'), mensagem)
+            self._contar_mensagem(rep, mensagem)
+            recentes = rep.setdefault('mensagens', [])
+            recentes.append(mensagem)
+            del recentes[:-MENSAGENS_RECENTES]
+            return None, True
+
+        # O feed leva só o que o dashboard mostra (o corpo pode ser grande e fica no arquivo).
+        evento = {'assunto': mensagem.get('assunto'), 'data': mensagem.get('data')}
+        self._mutate_representante(representante_email, anexar, lambda _: ('mensagem', evento))
+
+    def _particoes_de_mensagens(self, representante_email: str) -> Optional[list[str]]:
+        """Caminhos das partições do representante em ordem cronológica, ou None se ainda não migrado."""
+        rep_id = None
+        email = (representante_email or '').lower()
+        for r in self.get_diretorio().get('representantes', []):
+            if (r.get('email') or '').lower() == email:
+                rep_id = r.get('id')
+                break
+        if rep_id is None:
+            return None
+        diretorio = self._arquivo_representante(rep_id)
+        try:
+            nomes = os.listdir(diretorio)
+        except FileNotFoundError:
+            return None
+        return [os.path.join(diretorio, n) for n in sorted(nomes) if n.endswith('.ndjson')]
+
+    def iter_mensagens_of_representante(self, representante_email: str):
+        """Gera as mensagens do representante uma a uma, da mais antiga para a mais recente.
+
+        Para representantes migrados, lê as partições do arquivo linha a linha, sem carregar
+        o documento principal.
+        """
+        particoes = self._particoes_de_mensagens(representante_email)
+        if particoes is None:
+            rep = self.get_representante_by_email(representante_email)
+            if rep is not None:
+                yield from rep.get('mensagens', [])
+            return
+        for caminho in particoes:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    if linha.strip():
+                        yield json.loads(linha)
+
+    def _iter_mensagens_recentes_primeiro(self, representante_email: str):
+        particoes = self._particoes_de_mensagens(representante_email)
+        if particoes is None:
+            yield from reversed(list(self.iter_mensagens_of_representante(representante_email)))
+            return
+        for caminho in reversed(particoes):
+            # Uma partição cobre um mês, então ler o arquivo inteiro por vez é barato.
+            with open(caminho, 'r', encoding='utf-8') as f:
+                linhas = [l for l in f if l.strip()]
+            for linha in reversed(linhas):
+                yield json.loads(linha)
+
+    def get_mensagens_of_representante(self, representante_email: str, pagina: Optional[int] = None, por_pagina: int = 50) -> list[dict]:
+        """Retorna mensagens para o email do representante dado.
+
+        Sem `pagina`, retorna o histórico completo em ordem cronológica. Com `pagina` (1 = mais
+        recentes), retorna apenas essa página, da mais recente para a mais antiga, lendo só as
+        partições necessárias.
+        """
+        if pagina is None:
+            return list(self.iter_mensagens_of_representante(representante_email))
+        pular = (max(pagina, 1) - 1) * por_pagina
+        resultado = []
+        for mensagem in self._iter_mensagens_recentes_primeiro(representante_email):
+            if pular:
+                pular -= 1
+                continue
+            resultado.append(mensagem)
+            if len(resultado) >= por_pagina:
+                break
+        return resultado
+
+
+
+class GerenciadorDeSnapshots:
+    """Snapshots online, comprimidos e deduplicados do banco (documento, diretório e arquivo de mensagens).
+
+    Consistência sem bloquear escritores: o `JSONRepository` nunca altera o `db.json` no lugar
+    (sempre `os.replace`), então um hard link criado com o lock adquirido congela aquele
+    conteúdo. As partições do arquivo de mensagens só recebem acréscimos, então basta
+    registrar o tamanho de cada uma no mesmo instante. O lock é mantido apenas durante esses
+    `link`/`stat`; a leitura, o hash e a compressão acontecem depois, sem o lock.
+
+    Cada arquivo vira um objeto endereçado pelo SHA-256 do conteúdo em `objetos/`, comprimido
+    com zstd (se o pacote `zstandard` estiver instalado) ou gzip. Objetos iguais entre snapshots
+    são reaproveitados, então partições antigas de mensagens não são copiadas de novo. Cada
+    snapshot é um manifesto JSON em `manifestos/` e a retenção mantém os `manter` mais recentes.
+
+    `criar` e `aplicar_retencao` rodam sob `<diretorio>/.lock`: sem isso, a retenção de uma
+    execução (ex: cron lento sobreposto) apagaria objetos que outra já escreveu ou reaproveitou
+    mas cujo manifesto ainda não gravou.
+    """
+
+    BLOCO = 1024 * 1024
+    # Quanto (s) uma execução espera por outra que esteja criando snapshot ou aplicando retenção.
+    ESPERA_LOCK = 600
+
+    def __init__(self, repo: 'JSONRepository', diretorio: Optional[str] = None, manter: int = 7):
+        self.repo = repo
+        self.diretorio = diretorio or f'{repo.path}.snapshots'
+        self.manter = manter
+        self.base = os.path.dirname(os.path.abspath(repo.path))
+
+    @property
+    def _manifestos(self) -> str:
+        return os.path.join(self.diretorio, 'manifestos')
+
+    @property
+    def _objetos(self) -> str:
+        return os.path.join(self.diretorio, 'objetos')
+
+    def _caminho_objeto(self, sha256: str, algoritmo: str) -> str:
+        extensao = 'zst' if algoritmo == 'zstd' else 'gz'
+        return os.path.join(self._objetos, sha256[:2], f'{sha256}.{extensao}')
+
+    def _acquire_lock(self):
+        if FileLock is None:
+            return None
+        os.makedirs(self.diretorio, exist_ok=True)
+        return FileLock(os.path.join(self.diretorio, '.lock'), timeout=self.ESPERA_LOCK)
+
+    def _arquivos_do_banco(self) -> list[str]:
+        """Caminhos (absolutos) que compõem o estado do banco. Chamar com o lock adquirido."""
+        arquivos = [os.path.abspath(self.repo.path)]
+        if os.path.exists(self.repo.diretorio_path):
+            arquivos.append(os.path.abspath(self.repo.diretorio_path))
+        for raiz, _, nomes in os.walk(self.repo.arquivo_path):
+            arquivos.extend(os.path.abspath(os.path.join(raiz, n)) for n in sorted(nomes) if n.endswith('.ndjson'))
+        return arquivos
+
+    def criar(self) -> dict:
+        """Cria um snapshot e aplica a retenção. Retorna o manifesto."""
         lock = self._acquire_lock()
         if lock:
             lock.acquire()
         try:
-            data = self.load()
-            rep = None
-            for r in data.get('representantes', []):
-                if r.get('email', '').lower() == representante_email.lower():
-                    rep = r
-                    break
-            if rep is None:
-                raise KeyError('representante not found')
-
-            alunos = rep.get('alunos', [])
-            for i, a in enumerate(alunos):
-                if a.get('id') == aluno_id:
-                    del alunos[i]
-                    self.save(data)
-                    return True
-            return False
+            return self._criar()
         finally:
             if lock:
                 lock.release()
 
-    def adicionar_mensagem(self, representante_email: str, mensagem: dict) -> None:
+    def _criar(self) -> dict:
+        snapshot_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        preparo = os.path.join(self.diretorio, f'preparo-{snapshot_id}')
+        os.makedirs(preparo)
+        algoritmo = 'zstd' if zstandard is not None else 'gzip'
+        try:
+            # 1. Ponto no tempo: hard links + tamanhos, com o lock de escrita adquirido.
+            congelados = []
+            self.repo._ensure_file()
+            lock = self.repo._acquire_lock()
+            if lock:
+                lock.acquire()
+            try:
+                for i, origem in enumerate(self._arquivos_do_banco()):
+                    destino = os.path.join(preparo, str(i))
+                    try:
+                        os.link(origem, destino)
+                    except OSError:
+                        # Sistema de arquivos sem hard links: copia ainda com o lock.
+                        shutil.copyfile(origem, destino)
+                    congelados.append((os.path.relpath(origem, self.base), destino, os.path.getsize(destino)))
+            finally:
+                if lock:
+                    lock.release()
+
+            # 2. Hash, compressão e deduplicação, já sem o lock.
+            arquivos = []
+            novos = 0
+            for relativo, congelado, tamanho in congelados:
+                sha256, criado = self._armazenar(congelado, tamanho, algoritmo)
+                novos += criado
+                arquivos.append({'caminho': relativo, 'sha256': sha256, 'tamanho': tamanho})
+        finally:
+            shutil.rmtree(preparo, ignore_errors=True)
+
+        manifesto = {
+            'id': snapshot_id,
+            'criado_em': datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+            'algoritmo': algoritmo,
+            'objetos_novos': novos,
+            'arquivos': arquivos,
+        }
+        os.makedirs(self._manifestos, exist_ok=True)
+        JSONRepository._write_atomic(os.path.join(self._manifestos, f'{snapshot_id}.json'), manifesto, indent=2)
+        self._aplicar_retencao()
+        return manifesto
+
+    def _armazenar(self, caminho: str, tamanho: int, algoritmo: str) -> tuple[str, bool]:
+        """Comprime os primeiros `tamanho` bytes de `caminho` em um objeto. Retorna (sha256, criado)."""
+        os.makedirs(self._objetos, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._objetos)
+        try:
+            sha = hashlib.sha256()
+            with open(caminho, 'rb') as origem, os.fdopen(fd, 'wb') as bruto:
+                if algoritmo == 'zstd':
+                    saida = zstandard.ZstdCompressor().stream_writer(bruto, closefd=False)
+                else:
+                    saida = gzip.GzipFile(fileobj=bruto, mode='wb', mtime=0)
+                with saida:
+                    restante = tamanho
+                    while restante > 0:
+                        bloco = origem.read(min(self.BLOCO, restante))
+                        if not bloco:
+                            break
+                        sha.update(bloco)
+                        saida.write(bloco)
+                        restante -= len(bloco)
+            sha256 = sha.hexdigest()
+            final = self._caminho_objeto(sha256, algoritmo)
+            if os.path.exists(final):
+                return sha256, False
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            os.replace(tmp, final)
+            return sha256, True
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
+
+    def listar(self) -> list[dict]:
+        """Manifestos existentes, do mais antigo para o mais recente."""
+        try:
+            nomes = sorted(n for n in os.listdir(self._manifestos) if n.endswith('.json'))
+        except FileNotFoundError:
+            return []
+        manifestos = []
+        for nome in nomes:
+            with open(os.path.join(self._manifestos, nome), 'r', encoding='utf-8') as f:
+                manifestos.append(json.load(f))
+        return manifestos
+
+    def aplicar_retencao(self) -> list[str]:
+        """Remove snapshots além dos `manter` mais recentes e os objetos que ficaram sem referência."""
         lock = self._acquire_lock()
         if lock:
             lock.acquire()
         try:
-            data = self.load()
-            rep = None
-            for r in data.get('representantes', []):
-                if r.get('email', '').lower() == representante_email.lower():
-                    rep = r
-                    break
-            if rep is None:
-                raise KeyError('representante not found')
-
-            mensagens = rep.setdefault('mensagens', [])
-            mensagens.append(mensagem)
-            self.save(data)
+            return self._aplicar_retencao()
         finally:
             if lock:
                 lock.release()
-    
-    def get_mensagens_of_representante(self, representante_email: str) -> list[dict]:
-        """Retorna lista de mensagens para o email do representante dado."""
-        data = self.load()
-        for r in data.get('representantes', []):
-            if r.get('email', '').lower() == representante_email.lower():
-                return r.get('mensagens', [])
-        return []
+
+    def _aplicar_retencao(self) -> list[str]:
+        manifestos = self.listar()
+        removidos = [m['id'] for m in manifestos[:-self.manter]] if self.manter > 0 else []
+        for snapshot_id in removidos:
+            os.remove(os.path.join(self._manifestos, f'{snapshot_id}.json'))
+        if removidos:
+            referenciados = {
+                self._caminho_objeto(a['sha256'], m['algoritmo'])
+                for m in manifestos[len(removidos):] for a in m['arquivos']
+            }
+            for raiz, _, nomes in os.walk(self._objetos):
+                for nome in nomes:
+                    caminho = os.path.join(raiz, nome)
+                    if (nome.endswith('.gz') or nome.endswith('.zst')) and caminho not in referenciados:
+                        os.remove(caminho)
+        return removidos
+
+    def _obter(self, snapshot_id: str) -> dict:
+        caminho = os.path.join(self._manifestos, f'{snapshot_id}.json')
+        if not os.path.exists(caminho):
+            raise KeyError('snapshot not found')
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _abrir_objeto(self, sha256: str, algoritmo: str):
+        caminho = self._caminho_objeto(sha256, algoritmo)
+        if algoritmo == 'zstd':
+            if zstandard is None:
+                raise RuntimeError('snapshot comprimido com zstd: instale o pacote zstandard')
+            return zstandard.ZstdDecompressor().stream_reader(open(caminho, 'rb'), closefd=True)
+        return gzip.open(caminho, 'rb')
+
+    def _extrair(self, arquivo: dict, algoritmo: str, destino) -> None:
+        """Descomprime um objeto em `destino` (ou só lê, se None) e confere tamanho e SHA-256."""
+        sha = hashlib.sha256()
+        tamanho = 0
+        with self._abrir_objeto(arquivo['sha256'], algoritmo) as origem:
+            while True:
+                bloco = origem.read(self.BLOCO)
+                if not bloco:
+                    break
+                sha.update(bloco)
+                tamanho += len(bloco)
+                if destino is not None:
+                    destino.write(bloco)
+        if sha.hexdigest() != arquivo['sha256'] or tamanho != arquivo['tamanho']:
+            raise ValueError(f"checksum mismatch for {arquivo['caminho']}")
+
+    def verificar(self, snapshot_id: str) -> None:
+        """Confere todos os objetos de um snapshot. Levanta ValueError se algum estiver corrompido."""
+        manifesto = self._obter(snapshot_id)
+        for arquivo in manifesto['arquivos']:
+            self._extrair(arquivo, manifesto['algoritmo'], None)
+
+    def restaurar(self, snapshot_id: str, destino: str) -> list[str]:
+        """Restaura um snapshot no diretório `destino`, verificando os checksums.
+
+        Todos os arquivos são extraídos e verificados em temporários antes de qualquer um
+        ser movido para o lugar; se algum checksum falhar, nada é alterado em `destino`.
+        Retorna os caminhos restaurados.
+        """
+        manifesto = self._obter(snapshot_id)
+        temporarios = []
+        try:
+            for arquivo in manifesto['arquivos']:
+                final = os.path.join(destino, arquivo['caminho'])
+                os.makedirs(os.path.dirname(final) or '.', exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(final) or '.')
+                temporarios.append((tmp, final))
+                with os.fdopen(fd, 'wb') as saida:
+                    self._extrair(arquivo, manifesto['algoritmo'], saida)
+            for tmp, final in temporarios:
+                os.replace(tmp, final)
+            return [final for _, final in temporarios]
+        finally:
+            for tmp, _ in temporarios:
+                if os.path.exists(tmp):
+                    try:
+                        os.remove(tmp)
+                    except Exception:
+                        pass
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Manutenção do banco JSON do Representa.')
+    parser.add_argument('--db', default='db.json', help='caminho do banco (padrão: db.json)')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('migrar-mensagens', help='move o histórico inline de mensagens para o arquivo particionado')
+    cmd = sub.add_parser('snapshot', help='cria um snapshot online comprimido')
+    cmd.add_argument('--manter', type=int, default=7, help='quantos snapshots manter (padrão: 7)')
+    sub.add_parser('snapshots', help='lista os snapshots existentes')
+    cmd = sub.add_parser('verificar', help='confere os checksums de um snapshot')
+    cmd.add_argument('id')
+    cmd = sub.add_parser('restaurar', help='restaura um snapshot em um diretório, verificando checksums')
+    cmd.add_argument('id')
+    cmd.add_argument('--destino', required=True, help='diretório onde os arquivos serão restaurados')
+    args = parser.parse_args(argv)
+
+    repo = JSONRepository(args.db)
+    snapshots = GerenciadorDeSnapshots(repo, manter=getattr(args, 'manter', 7))
+    if args.comando == 'migrar-mensagens':
+        print(f"{repo.migrar_mensagens_para_arquivo()} representante(s) migrado(s).")
+    elif args.comando == 'snapshot':
+        manifesto = snapshots.criar()
+        print(f"Snapshot {manifesto['id']} criado: {len(manifesto['arquivos'])} arquivo(s), "
+              f"{manifesto['objetos_novos']} objeto(s) novo(s), {manifesto['algoritmo']}.")
+    elif args.comando == 'snapshots':
+        for m in snapshots.listar():
+            total = sum(a['tamanho'] for a in m['arquivos'])
+            print(f"{m['id']}  {m['criado_em']}  {len(m['arquivos'])} arquivo(s)  {total} bytes  {m['algoritmo']}")
+    else:
+        try:
+            if args.comando == 'verificar':
+                snapshots.verificar(args.id)
+                print(f"Snapshot {args.id} íntegro.")
+            else:
+                restaurados = snapshots.restaurar(args.id, args.destino)
+                print(f"{len(restaurados)} arquivo(s) restaurado(s) em {args.destino}.")
+        except (KeyError, ValueError) as e:
+            print(f"Erro: {e}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
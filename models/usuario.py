@@ -13,10 +13,13 @@ class Representante(Usuario):
         super().__init__(nome, email, telefone)
         self.senha = senha
         self.alunos = []
-        self.mensagens = []
+        self.mensagens = [] # Apenas as mensagens mais recentes; o histórico completo fica no arquivo
+        self.mensagens_total = 0
+        self.mensagens_por_dia = None # {'YYYY-MM-DD': quantidade}, quando disponível
         self.privilegios = 'representante'
         self.metadata = {}
         self.id = None # Adicionado para suportar rastreamento de ID
+        self.versao = 0 # Versão dos dados (incrementada a cada alteração de alunos/mensagens)
 
     def __repr__(self):
         return f"Representante(nome={self.nome!r}, email={self.email!r}, telefone={self.telefone!r}, alunos={self.alunos!r})"
@@ -20,10 +20,10 @@ Segurança:
 - Senhas são armazenadas como hashes SHA-256 (nota: para produção, recomenda-se algoritmos mais robustos como bcrypt ou Argon2).
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, make_response, Response, stream_with_context
 from dotenv import load_dotenv
 from models.usuario import Usuario, Representante, Aluno
-from services.controle_representates import service
+from services.controle_representates import service, RegistroRejeitado
 import hashlib
 import os
 from functools import wraps
@@ -41,6 +41,58 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret')
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # Sessão expira em 1 hora de inatividade
 app.config['SESSION_COOKIE_HTTPONLY'] = True     # Previne acesso ao cookie via JavaScript (proteção XSS)
 
+# Cache do diretório público de representantes (/registrar e /api/representantes).
+# O ETag acompanha a versão do diretório; o TTL curto limita o atraso para novos representantes.
+DIRETORIO_CACHE_TTL = int(os.getenv('DIRETORIO_CACHE_TTL', '60'))
+DIRETORIO_ITENS_FORMULARIO = 50  # quantos representantes o <select> traz já renderizados
+DIRETORIO_MAX_POR_PAGINA = 100
+
+# Feed de alterações via SSE. O caminho padrão é o servidor dedicado `sse_server.py`, indicado
+# em EVENTOS_URL; sem ele o dashboard não abre conexão e mostra as alterações de outros
+# workers ao recarregar. A rota `/api/eventos` do próprio Flask é opcional (EVENTOS_FLASK=1):
+# em workers síncronos cada stream prende um worker por até EVENTOS_DURACAO_MAX segundos.
+EVENTOS_URL = os.getenv('EVENTOS_URL')
+EVENTOS_FLASK = os.getenv('EVENTOS_FLASK') == '1'
+EVENTOS_DURACAO_MAX = int(os.getenv('EVENTOS_DURACAO_MAX', '300'))
+
+# Limites do auto-cadastro público (`POST /registrar`), no formato "N/S" (N envios a cada S
+# segundos, com rajadas de até N), ou "off" para desativar. Turmas cadastrando da mesma rede
+# (NAT) compartilham o IP, então o limite por IP não deve ser apertado demais. Atrás de um proxy
+# reverso, defina CONFIAR_PROXY=1 para usar o IP do cliente informado em X-Forwarded-For.
+def _converter_limite(valor: str):
+    """Converte 'N/S' em `(capacidade, janela_s)`; "off", "0" e "0/S" viram None (desativado)."""
+    valor = valor.strip().lower()
+    if valor in ('off', '0') or valor.startswith('0/'):
+        return None
+    capacidade, janela = valor.split('/', 1)
+    capacidade, janela = int(capacidade), float(janela)
+    if capacidade < 1 or janela <= 0:
+        raise ValueError(f'limite inválido: {valor!r}')
+    return capacidade, janela
+
+
+def ler_limite(nome: str, padrao: str):
+    """Lê o limite `nome` do ambiente; valores inválidos usam `padrao`, com um aviso."""
+    valor = os.getenv(nome) or padrao
+    try:
+        return _converter_limite(valor)
+    except ValueError:
+        print(f"Aviso: {nome}={valor!r} inválido (use 'N/S' ou 'off'); usando {padrao}")
+        return _converter_limite(padrao)
+
+
+REGISTRO_LIMITE_IP = ler_limite('REGISTRO_LIMITE_IP', '30/60')
+REGISTRO_LIMITE_REPRESENTANTE = ler_limite('REGISTRO_LIMITE_REPRESENTANTE', '300/60')
+if os.getenv('CONFIAR_PROXY') == '1':
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
+# Pré-aquecimento: com REPRESENTA_PREAQUECER=1 o banco é carregado e indexado na importação do
+# módulo (boot do worker), e não na primeira requisição. Com o gunicorn, combine com --preload
+# para fazer isso uma vez no master e compartilhar as páginas com os workers via fork.
+if os.getenv('REPRESENTA_PREAQUECER') == '1':
+    service.preaquecer()
+
 def login_required(f):
     """
     Decorator personalizado para proteger rotas que exigem autenticação.
@@ -57,6 +109,20 @@ def login_required(f):
     return decorated_function
 
 
+def api_login_required(f):
+    """
+    Variante do `login_required` para rotas da API JSON.
+
+    Em vez de redirecionar para o login, responde 401 com um corpo JSON.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_email' not in session:
+            return jsonify({'erro': 'não autenticado'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
 def get_usuario_ativo():
     """
     Helper para recuperar o objeto Representante completo do usuário logado atualmente.
@@ -177,8 +243,18 @@ def dashboard():
         chart_data = get_dashboard_chart_data(usuarioAtivo)
         print(chart_data['student_chart_values'])
 
+        # Lista serializável usada pelo JavaScript da tabela de representados,
+        # que depois é atualizada no lugar pelas respostas de /api/alunos.
+        alunos_json = [
+            {'id': a.id, 'nome': a.nome, 'email': a.email, 'telefone': a.telefone,
+             'data_adicionado': a.data_adicionado}
+            for a in usuarioAtivo.alunos
+        ]
+
         return render_template('dashboard.html', 
                                usuarioAtivo=usuarioAtivo,
+                               alunos_json=alunos_json,
+                               eventos_url=EVENTOS_URL or (url_for('api_eventos') if EVENTOS_FLASK else None),
                                msg_chart_labels=chart_data['msg_chart_labels'],
                                msg_chart_values=chart_data['msg_chart_values'],
                                student_chart_labels=chart_data['student_chart_labels'],
@@ -299,6 +375,158 @@ def deletar_representado():
     return redirect(url_for('dashboard'))
 
 
+@app.route('/exportar/<recurso>.<formato>')
+@login_required
+def exportar(recurso, formato):
+    """
+    Rota de Exportação de Alunos ou Mensagens.
+
+    Transmite o arquivo em streaming (CSV ou NDJSON), linha a linha, sem montá-lo em memória.
+    Parâmetros de query opcionais: `campos` (lista separada por vírgulas) e o período
+    `de` / `ate` no formato YYYY-MM-DD.
+    Ex: /exportar/alunos.csv?campos=nome,email&de=2025-11-01
+    """
+    from services.exportacao import FORMATOS, ler_data
+
+    campos = [c.strip() for c in request.args.get('campos', '').split(',') if c.strip()]
+    try:
+        linhas = service.exportar(session['user_email'], recurso, formato, campos,
+                                  ler_data(request.args.get('de')), ler_data(request.args.get('ate')))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    return Response(stream_with_context(linhas), mimetype=FORMATOS[formato],
+                    headers={'Content-Disposition': f'attachment; filename={recurso}.{formato}'})
+
+
+# --- API JSON de Representados ---
+# As rotas abaixo respondem apenas com o registro alterado e a nova versão de dados do
+# representante, para que o dashboard atualize a tabela no lugar sem recarregar a página.
+
+def _campos_aluno(dados, obrigatorios: tuple = ()):
+    """Valida o corpo JSON e retorna `(campos, erro)`.
+
+    `campos` traz apenas os campos editáveis preenchidos (strings vazias são ignoradas, como no
+    formulário do dashboard); `erro` é a mensagem para uma resposta 400, ou None.
+    """
+    if not isinstance(dados, dict):
+        return None, 'o corpo deve ser um objeto JSON'
+    campos = {}
+    for k in ('nome', 'email', 'telefone'):
+        valor = dados.get(k)
+        if valor is None:
+            continue
+        if not isinstance(valor, str):
+            return None, f'o campo {k} deve ser texto'
+        if valor.strip():
+            campos[k] = valor.strip()
+    for k in obrigatorios:
+        if k not in campos:
+            return None, f'o campo {k} é obrigatório'
+    return campos, None
+
+
+@app.route('/api/alunos', methods=['POST'])
+@api_login_required
+def api_criar_aluno():
+    """
+    Cria um representado (aluno) para o representante logado.
+
+    Corpo JSON: `{"nome", "email", "telefone"}` (nome e email obrigatórios). Retorna 201 com
+    `{"aluno", "versao"}`, ou 400 se o corpo for inválido.
+    """
+    campos, erro = _campos_aluno(request.get_json(silent=True), obrigatorios=('nome', 'email'))
+    if erro:
+        return jsonify({'erro': erro}), 400
+    try:
+        aluno, versao = service.alterar_aluno(session['user_email'], 'criar', campos=campos)
+    except KeyError:
+        return jsonify({'erro': 'representante não encontrado'}), 404
+    return jsonify({'aluno': aluno, 'versao': versao}), 201
+
+
+@app.route('/api/alunos/<aluno_id>', methods=['PATCH'])
+@api_login_required
+def api_atualizar_aluno(aluno_id):
+    """
+    Atualiza campos de um representado. Retorna `{"aluno", "versao"}`, ou 400 se o corpo for
+    inválido ou não trouxer nenhum campo editável.
+    """
+    campos, erro = _campos_aluno(request.get_json(silent=True))
+    if erro is None and not campos:
+        erro = 'nenhum campo para atualizar'
+    if erro:
+        return jsonify({'erro': erro}), 400
+    try:
+        aluno, versao = service.alterar_aluno(session['user_email'], 'atualizar', aluno_id, campos)
+    except KeyError:
+        return jsonify({'erro': 'representado não encontrado'}), 404
+    return jsonify({'aluno': aluno, 'versao': versao})
+
+
+@app.route('/api/alunos/<aluno_id>', methods=['DELETE'])
+@api_login_required
+def api_remover_aluno(aluno_id):
+    """
+    Remove um representado. Retorna `{"id", "versao"}`.
+    """
+    try:
+        aluno, versao = service.alterar_aluno(session['user_email'], 'remover', aluno_id)
+    except KeyError:
+        aluno = None
+    if aluno is None:
+        return jsonify({'erro': 'representado não encontrado'}), 404
+    return jsonify({'id': aluno_id, 'versao': versao})
+
+
+@app.route('/api/mensagens')
+@api_login_required
+def api_mensagens():
+    """
+    Histórico de Mensagens Paginado (JSON).
+
+    O documento principal guarda só as mensagens recentes; páginas mais antigas são lidas
+    sob demanda do arquivo particionado. `pagina=1` traz as mais recentes.
+    """
+    pagina = max(request.args.get('pagina', 1, type=int), 1)
+    por_pagina = min(max(request.args.get('por_pagina', 50, type=int), 1), 200)
+    mensagens = service.listar_mensagens(session['user_email'], pagina, por_pagina)
+    return jsonify({'pagina': pagina, 'por_pagina': por_pagina, 'mensagens': mensagens})
+
+
+@app.route('/api/eventos')
+@api_login_required
+def api_eventos():
+    """
+    Feed de Alterações do Representante (Server-Sent Events).
+
+    Transmite eventos `aluno_criado`, `aluno_atualizado`, `aluno_removido` e `mensagem` com
+    versão maior que `?desde=` (ou o cabeçalho `Last-Event-ID` enviado na reconexão).
+    Os eventos vêm do feed em arquivo do repositório, então alterações feitas em qualquer
+    worker (ex: auto-cadastros em `/registrar`) chegam a todos os dashboards abertos.
+    Desativada (404) a menos que EVENTOS_FLASK=1.
+    """
+    if not EVENTOS_FLASK:
+        return jsonify({'erro': 'feed de eventos desativado neste servidor'}), 404
+    rep_id = service.id_representante(session['user_email'])
+    if rep_id is None:
+        return jsonify({'erro': 'representante não encontrado'}), 404
+    desde = request.headers.get('Last-Event-ID', type=int)
+    if desde is None:
+        desde = request.args.get('desde', 0, type=int)
+
+    # Importado aqui: services.eventos traz o asyncio, desnecessário para as demais rotas.
+    from services.eventos import formatar_evento_sse
+
+    def gerar():
+        yield 'retry: 3000\n\n'
+        for evento in service.feed_eventos.seguir(rep_id, desde, duracao_max=EVENTOS_DURACAO_MAX):
+            yield formatar_evento_sse(evento)
+
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/registrar', methods=['GET', 'POST'])
 def registrar_aluno():
     """
@@ -314,15 +542,82 @@ def registrar_aluno():
         representante_email = request.form.get('representante_email')
 
         try:
-            service.adicionar_aluno(representante_email, nome, email, telefone)
+            service.registrar_aluno_publico(representante_email, nome, email, telefone, request.remote_addr,
+                                            REGISTRO_LIMITE_IP, REGISTRO_LIMITE_REPRESENTANTE)
             flash('Cadastro realizado com sucesso! Aguarde contato do seu representante.', 'success')
+        except RegistroRejeitado as e:
+            if e.espera:
+                # Limite de taxa: resposta curta, sem renderizar o formulário nem tocar no banco.
+                resposta = make_response(str(e), 429)
+                resposta.headers['Retry-After'] = str(int(e.espera) + 1)
+                resposta.mimetype = 'text/plain'
+                return resposta
+            flash(str(e), 'warning')
         except Exception as e:
             flash(f'Erro ao realizar cadastro: {e}', 'danger')
         return redirect(url_for('registrar_aluno'))
     
-    # GET request: Renderiza o formulário público com a lista de representantes disponíveis
-    representantes = service.listar_representantes()
-    return render_template('public_form.html', representantes=representantes)
+    # GET request: Renderiza o formulário público a partir do diretório pré-computado.
+    # Se o navegador/proxy já tem a versão atual, responde 304 sem renderizar nada.
+    etag = f"diretorio-{service.versao_diretorio()}"
+    if request.if_none_match.contains(etag):
+        return _resposta_diretorio(make_response('', 304), etag)
+
+    pagina = service.buscar_representantes(por_pagina=DIRETORIO_ITENS_FORMULARIO)
+    resposta = make_response(render_template('public_form.html',
+                                             representantes=pagina['representantes'],
+                                             total_representantes=pagina['total']))
+    return _resposta_diretorio(resposta, etag)
+
+
+@app.route('/api/registrar/contadores')
+@api_login_required
+def api_contadores_registro():
+    """
+    Contadores do Auto-Cadastro Público.
+
+    Retorna os envios aceitos e recusados por motivo (`rejeitado_ip`, `rejeitado_representante`,
+    `rejeitado_duplicado`, `rejeitado_representante_inexistente`), somados entre todos os
+    workers, junto com os limites configurados, para calibrar `REGISTRO_LIMITE_*`.
+    """
+    return jsonify({
+        'contadores': service.contadores_registro(),
+        'limites': {
+            escopo: dict(zip(('capacidade', 'janela_s'), limite)) if limite else None
+            for escopo, limite in (('ip', REGISTRO_LIMITE_IP), ('representante', REGISTRO_LIMITE_REPRESENTANTE))
+        },
+    })
+
+
+@app.route('/api/representantes')
+def api_representantes():
+    """
+    Diretório Público de Representantes (JSON).
+
+    Busca paginada usada pelo formulário de `/registrar` para que o dropdown não precise
+    trazer todos os representantes de uma vez.
+
+    Parâmetros de query: `q` (trecho de nome ou email), `pagina` e `por_pagina`.
+    """
+    termo = request.args.get('q', '')
+    pagina = request.args.get('pagina', 1, type=int)
+    por_pagina = min(max(request.args.get('por_pagina', 20, type=int), 1), DIRETORIO_MAX_POR_PAGINA)
+
+    # A versão entra no ETag junto com os parâmetros, pois cada combinação gera um corpo diferente.
+    etag = f"diretorio-{service.versao_diretorio()}-{hashlib.sha256(f'{termo}|{pagina}|{por_pagina}'.encode()).hexdigest()[:16]}"
+    if request.if_none_match.contains(etag):
+        return _resposta_diretorio(make_response('', 304), etag)
+
+    resultado = service.buscar_representantes(termo, pagina, por_pagina)
+    return _resposta_diretorio(jsonify(resultado), etag)
+
+
+def _resposta_diretorio(resposta, etag):
+    """Aplica ETag e cache público de curta duração às respostas do diretório."""
+    resposta.set_etag(etag)
+    resposta.cache_control.public = True
+    resposta.cache_control.max_age = DIRETORIO_CACHE_TTL
+    return resposta
 
 
 if __name__ == '__main__':
@@ -45,15 +45,20 @@ def get_dashboard_chart_data(usuario_ativo):
         all_dates.append(end_date.strftime("%Y-%m-%d"))
 
     # --- 1. Mensagens por Dia ---
+    # Representantes com histórico arquivado trazem a contagem diária pronta; as mensagens
+    # em memória são apenas as mais recentes.
     msgs_per_day = defaultdict(int)
-    for msg in usuario_ativo.mensagens:
-        # formato msg['data']: "dd/mm/YYYY HH:MM:SS"
-        try:
-            dt = datetime.strptime(msg['data'], "%d/%m/%Y %H:%M:%S")
-            date_str = dt.strftime("%Y-%m-%d")
-            msgs_per_day[date_str] += 1
-        except ValueError:
-            continue
+    if getattr(usuario_ativo, 'mensagens_por_dia', None) is not None:
+        msgs_per_day.update(usuario_ativo.mensagens_por_dia)
+    else:
+        for msg in usuario_ativo.mensagens:
+            # formato msg['data']: "dd/mm/YYYY HH:MM:SS" (mensagens antigas podem não ter data)
+            try:
+                dt = datetime.strptime(msg.get('data') or '', "%d/%m/%Y %H:%M:%S")
+                date_str = dt.strftime("%Y-%m-%d")
+                msgs_per_day[date_str] += 1
+            except ValueError:
+                continue
     
     # Preencher todas as datas com 0 se não houver mensagens
     msg_chart_values = [msgs_per_day[d] for d in all_dates]
@@ -8,12 +8,47 @@ e envio de e-mail.
 from typing import Optional, List
 from models.usuario import Representante, Aluno
 from controle_db import JSONRepository
-from services.email_sender import EmailSender
+
+
+class RegistroRejeitado(Exception):
+    """Auto-cadastro recusado antes de tocar no banco.
+
+    `motivo` é 'limite_ip', 'limite_representante', 'representante_inexistente' ou 'duplicado';
+    `espera` é quantos segundos aguardar antes de tentar de novo (apenas para os limites).
+    """
+
+    def __init__(self, motivo: str, mensagem: str, espera: float = 0.0):
+        super().__init__(mensagem)
+        self.motivo = motivo
+        self.espera = espera
+
 
 class RepresentanteService:
     def __init__(self, db_path: str = 'db.json'):
         self._repo = JSONRepository(db_path)
-        self._email_sender = EmailSender()
+        self._email_sender_instancia = None
+        self._limitador_path = f'{db_path}.limites.sqlite3'
+        self._limitador_instancia = None
+
+    @property
+    def _email_sender(self):
+        """EmailSender criado no primeiro envio (evita importar smtplib/email.mime no boot)."""
+        if self._email_sender_instancia is None:
+            from services.email_sender import EmailSender
+            self._email_sender_instancia = EmailSender()
+        return self._email_sender_instancia
+
+    @property
+    def _limitador(self):
+        """LimitadorDeTaxa criado no primeiro uso (evita importar sqlite3 no boot)."""
+        if self._limitador_instancia is None:
+            from services.limitador import LimitadorDeTaxa
+            self._limitador_instancia = LimitadorDeTaxa(self._limitador_path)
+        return self._limitador_instancia
+
+    def preaquecer(self) -> None:
+        """Carrega e indexa o banco antes da primeira requisição (chamado no boot do worker)."""
+        self._repo.preaquecer()
 
     def _dict_to_representante(self, d: dict) -> Representante:
         """Converte um dicionário armazenado em uma instância do modelo Representante."""
@@ -32,9 +67,12 @@ class RepresentanteService:
             aluno_obj.id = a.get('id')
             rep.alunos.append(aluno_obj)
             
-        # Anexar mensagens
-        rep.mensagens = d.get('mensagens', [])
-        rep.metadata = d.get('metadata', {})
+        # Anexar mensagens recentes e contadores (o histórico completo fica no arquivo)
+        rep.mensagens = list(d.get('mensagens', []))
+        rep.mensagens_total = d.get('mensagens_total', len(rep.mensagens))
+        rep.mensagens_por_dia = d.get('mensagens_por_dia')
+        rep.metadata = dict(d.get('metadata', {}))
+        rep.versao = d.get('versao', 0)
         return rep
 
     def adicionar_representante(self, nome: str, email: str, telefone: str, senha: str = None) -> Representante:
@@ -55,26 +93,136 @@ class RepresentanteService:
 
     def listar_representantes(self) -> List[dict]:
         """Retorna uma lista de todos os representantes (nome e email)."""
-        data = self._repo.load()
-        reps = []
-        for r in data.get('representantes', []):
-            reps.append({'nome': r.get('nome'), 'email': r.get('email')})
-        return reps
+        return [{'nome': r.get('nome'), 'email': r.get('email')}
+                for r in self._repo.get_diretorio().get('representantes', [])]
+
+    def versao_diretorio(self) -> int:
+        """Versão atual do diretório de representantes (muda apenas quando um representante é adicionado)."""
+        return self._repo.get_diretorio().get('versao', 0)
+
+    def buscar_representantes(self, termo: str = '', pagina: int = 1, por_pagina: int = 20) -> dict:
+        """Busca paginada no diretório de representantes por trecho do nome ou do email."""
+        diretorio = self._repo.get_diretorio()
+        termo = (termo or '').strip().lower()
+        encontrados = [
+            r for r in diretorio.get('representantes', [])
+            if not termo or termo in (r.get('nome') or '') or termo in (r.get('email') or '')
+        ]
+        pagina = max(pagina, 1)
+        inicio = (pagina - 1) * por_pagina
+        return {
+            'versao': diretorio.get('versao', 0),
+            'total': len(encontrados),
+            'pagina': pagina,
+            'por_pagina': por_pagina,
+            'representantes': [{'nome': r.get('nome'), 'email': r.get('email')}
+                               for r in encontrados[inicio:inicio + por_pagina]],
+        }
 
     def adicionar_aluno(self, representante_email: str, nome: str, email: str, telefone: str) -> Aluno:
         """Adiciona um aluno ao representante."""
-        aluno_dict = self._repo.add_aluno(representante_email, nome, email, telefone)
+        aluno_dict = self.alterar_aluno(representante_email, 'criar', campos={
+            'nome': nome, 'email': email, 'telefone': telefone})[0]
         aluno = Aluno(aluno_dict.get('nome'), aluno_dict.get('email'), aluno_dict.get('telefone'))
         aluno.id = aluno_dict.get('id')
         return aluno
 
+    def registrar_aluno_publico(self, representante_email: str, nome: str, email: str, telefone: str,
+                                ip: str, limite_ip: Optional[tuple], limite_representante: Optional[tuple]) -> Aluno:
+        """Auto-cadastro público com limites de taxa e rejeição barata de duplicatas.
+
+        Tudo que pode recusar a requisição roda antes do lock de escrita do banco e sem carregar o
+        `db.json`: o balde do IP, a existência do representante (no diretório), a duplicata (no
+        índice de alunos do limitador) e o balde do representante. Duplicatas não consomem o balde
+        do representante; as que o índice não conhece são recusadas por `unico=True` sob o lock.
+        Os limites são `(capacidade, janela_s)`; recusas levantam `RegistroRejeitado` e são
+        contadas. Um limite `None` desativa aquele balde; com ambos `None` não há contadores.
+        """
+        representante_email = (representante_email or '').strip().lower()
+        ativo = limite_ip is not None or limite_representante is not None
+
+        def contar(nome):
+            if ativo:
+                self._limitador.incrementar(nome)
+
+        espera = self._limitador.permitir('ip', ip or '-', *limite_ip) if limite_ip else 0
+        if espera:
+            raise RegistroRejeitado('limite_ip', 'Muitas tentativas deste endereço. Tente novamente em instantes.', espera)
+
+        if self.id_representante(representante_email) is None:
+            contar('rejeitado_representante_inexistente')
+            raise RegistroRejeitado('representante_inexistente', 'Representante não encontrado.')
+        if email and self._limitador.aluno_conhecido(representante_email, email):
+            contar('rejeitado_duplicado')
+            raise RegistroRejeitado('duplicado', 'Este email já está cadastrado com este representante.')
+
+        espera = (self._limitador.permitir('representante', representante_email, *limite_representante)
+                  if limite_representante else 0)
+        if espera:
+            raise RegistroRejeitado('limite_representante',
+                                    'Muitos cadastros para este representante agora. Tente novamente em instantes.', espera)
+
+        try:
+            aluno_dict = self.alterar_aluno(representante_email, 'criar', campos={
+                'nome': nome, 'email': email, 'telefone': telefone}, unico=True)[0]
+        except ValueError:
+            # Duplicata ainda fora do índice (ou que chegou entre a verificação e o lock).
+            contar('rejeitado_duplicado')
+            raise RegistroRejeitado('duplicado', 'Este email já está cadastrado com este representante.')
+        contar('aceito')
+        aluno = Aluno(aluno_dict.get('nome'), aluno_dict.get('email'), aluno_dict.get('telefone'))
+        aluno.id = aluno_dict.get('id')
+        return aluno
+
+    def contadores_registro(self) -> dict:
+        """Contadores de auto-cadastros aceitos e recusados por motivo (compartilhados entre workers)."""
+        return self._limitador.contadores()
+
     def remover_aluno(self, representante_email: str, aluno_id: str) -> bool:
         """Remove um aluno por ID."""
-        return self._repo.remove_aluno_by_id(representante_email, aluno_id)
+        return self.alterar_aluno(representante_email, 'remover', aluno_id)[0] is not None
 
     def atualizar_aluno(self, representante_email: str, aluno_id: str, updates: dict) -> dict:
         """Atualiza dados de um aluno."""
-        return self._repo.update_aluno(representante_email, aluno_id, updates)
+        return self.alterar_aluno(representante_email, 'atualizar', aluno_id, updates)[0]
+
+    def listar_mensagens(self, representante_email: str, pagina: int = 1, por_pagina: int = 50) -> List[dict]:
+        """Página do histórico de mensagens (1 = mais recentes), lida sob demanda do arquivo."""
+        return self._repo.get_mensagens_of_representante(representante_email, pagina, por_pagina)
+
+    @property
+    def feed_eventos(self):
+        """Feed de alterações (`FeedDeEventos`) do banco usado por este serviço."""
+        return self._repo.eventos
+
+    def id_representante(self, email: str) -> Optional[str]:
+        """Retorna o id do representante a partir do diretório pré-computado (sem ler o banco completo)."""
+        email = (email or '').lower()
+        for r in self._repo.get_diretorio().get('representantes', []):
+            if (r.get('email') or '').lower() == email:
+                return r.get('id')
+        return None
+
+    def exportar(self, representante_email: str, recurso: str, formato: str = 'csv', campos: list = None,
+                 inicio=None, fim=None):
+        """Gerador com a exportação (CSV/NDJSON) de alunos ou mensagens. Ver `services.exportacao`."""
+        from services.exportacao import exportar
+        return exportar(self._repo, representante_email, recurso, formato, campos, inicio, fim)
+
+    def alterar_aluno(self, representante_email: str, acao: str, aluno_id: str = None, campos: dict = None,
+                      unico: bool = False) -> tuple:
+        """Cria ('criar'), atualiza ('atualizar') ou remove ('remover') um aluno.
+
+        Retorna `(aluno_dict, versao)` sem hidratar o representante, para uso pela API JSON.
+        Mantém o índice de alunos usado pelo auto-cadastro: criações entram nele, remoções e
+        trocas de email invalidam as entradas do representante até a nova versão.
+        """
+        aluno, versao = self._repo.aplicar_alteracao_aluno(representante_email, acao, aluno_id, campos, unico)
+        if acao == 'criar' and aluno.get('email'):
+            self._limitador.lembrar_aluno(representante_email, aluno['email'], versao)
+        elif acao == 'remover' or (acao == 'atualizar' and 'email' in (campos or {})):
+            self._limitador.esquecer_alunos(representante_email, versao)
+        return aluno, versao
 
     def enviar_mensagem(self, representante: Representante, assunto: str, corpo: str) -> bool:
         """Envia email para todos os alunos e salva a mensagem no histórico."""
@@ -97,6 +245,7 @@ class RepresentanteService:
                 }
                 self._repo.adicionar_mensagem(representante.email, msg_data)
                 representante.mensagens.append(msg_data)
+                representante.mensagens_total += 1
                 return True
             return False
         except Exception as e:
@@ -1,10 +1,8 @@
-import smtplib
 import os
-from dotenv import load_dotenv
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
-load_dotenv()
+# smtplib e email.mime são importados só no envio: custam alguns milissegundos no boot de cada
+# worker e a maioria das requisições nunca envia email. O .env é carregado por quem inicia o
+# processo (server.py ou o bloco __main__ abaixo).
 
 class EmailSender:
     def __init__(self):
@@ -13,6 +11,10 @@ class EmailSender:
         self.email_password = os.getenv('EMAIL_PASSWORD')
 
     def send_email(self, address_list, subject, body):
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         problems = []
         try:
             with smtplib.SMTP(self.smtp_server, port=587) as server:
@@ -46,5 +48,7 @@ class EmailSender:
         
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
     email_sender = EmailSender()
     email_sender.send_email(['fernandorldf@gmail.com'], 'Test Subject', 'This is a test email.')
\ No newline at end of file
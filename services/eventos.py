@@ -0,0 +1,88 @@
+"""Entrega dos eventos de alteração (feed do `JSONRepository`) via Server-Sent Events.
+
+- `formatar_evento_sse` converte um evento do feed no formato do protocolo SSE; é usado tanto
+  pela rota `/api/eventos` do Flask quanto pelo servidor dedicado `sse_server.py`.
+- `CentralDeEventos` faz o fan-out assíncrono: uma única tarefa por representante observa o
+  arquivo do feed (um `stat` por intervalo) e distribui os eventos para todas as conexões
+  abertas daquele representante, de modo que conexões ociosas não custam leituras de disco.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from typing import Optional
+
+
+def formatar_evento_sse(evento: Optional[dict]) -> str:
+    """Formata um evento do feed como mensagem SSE. `None` vira um comentário de heartbeat."""
+    if evento is None:
+        return ': ping\n\n'
+    dados = json.dumps({'versao': evento.get('versao'), 'dados': evento.get('dados')}, ensure_ascii=False)
+    return f"id: {evento.get('versao')}\nevent: {evento.get('tipo')}\ndata: {dados}\n\n"
+
+
+class CentralDeEventos:
+    """Distribui eventos do `FeedDeEventos` para filas `asyncio` de vários assinantes."""
+
+    def __init__(self, feed, intervalo: float = 1.0):
+        self._feed = feed
+        self._intervalo = intervalo
+        self._assinantes = defaultdict(set)
+        self._posicoes = {}
+        # Última versão distribuída por representante (None: nada visto ainda).
+        self._ultimas = {}
+        self._tarefas = {}
+
+    def assinar(self, rep_id: str, desde: int) -> asyncio.Queue:
+        """Cria uma fila que recebe os eventos com versão maior que `desde` (incluindo os já gravados).
+
+        A fila pode repetir eventos do histórico; o consumidor descarta versões já enviadas.
+        """
+        fila = asyncio.Queue()
+        if rep_id not in self._tarefas:
+            # Posiciona o observador no fim atual do arquivo antes de ler o histórico,
+            # para que nada publicado entre as duas leituras se perca.
+            eventos, self._posicoes[rep_id] = self._feed.ler(rep_id)
+            self._ultimas[rep_id] = eventos[-1].get('versao', 0) if eventos else None
+            self._tarefas[rep_id] = asyncio.ensure_future(self._observar(rep_id))
+        self._assinantes[rep_id].add(fila)
+        eventos, _ = self._feed.ler(rep_id)
+        for evento in self._feed.eventos_apos(eventos, desde):
+            fila.put_nowait(evento)
+        return fila
+
+    def cancelar(self, rep_id: str, fila: asyncio.Queue) -> None:
+        self._assinantes[rep_id].discard(fila)
+
+    async def _observar(self, rep_id: str) -> None:
+        try:
+            while self._assinantes.get(rep_id):
+                posicao = self._posicoes[rep_id]
+                try:
+                    if posicao is None or self._feed.mudou(rep_id, posicao):
+                        eventos, self._posicoes[rep_id] = self._feed.ler(rep_id, posicao)
+                        self._distribuir(rep_id, eventos)
+                except (OSError, ValueError) as e:
+                    # Leitura inconsistente (ex: arquivo trocado no meio da leitura): relê desde o
+                    # início na próxima volta; a lacuna, se houver, vira 'ressincronizar'.
+                    print(f"Feed de eventos de {rep_id} ilegível, reposicionando: {e}")
+                    self._posicoes[rep_id] = None
+                await asyncio.sleep(self._intervalo)
+        finally:
+            self._tarefas.pop(rep_id, None)
+            self._posicoes.pop(rep_id, None)
+            self._ultimas.pop(rep_id, None)
+            self._assinantes.pop(rep_id, None)
+
+    def _distribuir(self, rep_id: str, eventos: list) -> None:
+        """Envia aos assinantes os eventos posteriores ao último distribuído, sem repetir o histórico
+        relido após uma compactação e sinalizando lacunas com 'ressincronizar'."""
+        ultima = self._ultimas.get(rep_id)
+        if ultima is not None:
+            eventos = self._feed.eventos_apos(eventos, ultima)
+        if not eventos:
+            return
+        self._ultimas[rep_id] = eventos[-1].get('versao', 0)
+        for fila in list(self._assinantes[rep_id]):
+            for evento in eventos:
+                fila.put_nowait(evento)
@@ -0,0 +1,162 @@
+"""Exportação em streaming de alunos e do histórico de mensagens (CSV ou NDJSON).
+
+Tudo aqui é baseado em geradores: os registros vêm dos iteradores do `JSONRepository`,
+passam pelo filtro de período e seleção de campos e são serializados linha a linha, sem
+montar a lista filtrada nem o arquivo de saída em memória. As mesmas funções alimentam as
+rotas `/exportar/...` do servidor e a linha de comando:
+
+    python -m services.exportacao rep@exemplo.com alunos --formato csv --campos nome,email
+    python -m services.exportacao rep@exemplo.com mensagens --formato ndjson --de 2025-11-01 --ate 2025-11-30
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional, Sequence
+
+from controle_db import JSONRepository
+
+FORMATO_DATA = "%d/%m/%Y %H:%M:%S"
+
+# recurso -> (campos disponíveis, campo de data usado no filtro de período)
+RECURSOS = {
+    'alunos': (('id', 'nome', 'email', 'telefone', 'data_adicionado'), 'data_adicionado'),
+    'mensagens': (('data', 'assunto', 'corpo'), 'data'),
+}
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def validar_campos(recurso: str, campos: Optional[Sequence[str]]) -> tuple:
+    """Retorna os campos pedidos (ou todos), rejeitando campos desconhecidos com ValueError."""
+    disponiveis = RECURSOS[recurso][0]
+    if not campos:
+        return disponiveis
+    desconhecidos = [c for c in campos if c not in disponiveis]
+    if desconhecidos:
+        raise ValueError(f"campos inválidos para {recurso}: {', '.join(desconhecidos)}")
+    return tuple(campos)
+
+
+def ler_data(valor: Optional[str]) -> Optional[date]:
+    """Converte 'YYYY-MM-DD' em date (None se vazio). Levanta ValueError se o formato for inválido."""
+    if not valor:
+        return None
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+
+def filtrar_periodo(registros: Iterable[dict], campo_data: str,
+                    inicio: Optional[date] = None, fim: Optional[date] = None) -> Iterator[dict]:
+    """Mantém registros cuja data está em [inicio, fim] (inclusive). Sem limites, repassa tudo."""
+    for registro in registros:
+        if inicio is None and fim is None:
+            yield registro
+            continue
+        try:
+            dia = datetime.strptime(registro.get(campo_data) or '', FORMATO_DATA).date()
+        except ValueError:
+            continue
+        if (inicio is None or dia >= inicio) and (fim is None or dia <= fim):
+            yield registro
+
+
+# Células iniciadas por estes caracteres são interpretadas como fórmula por planilhas.
+_INICIO_DE_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+# Telefones (ex: E.164, `+5582...`) e números começam com +/- mas não são fórmulas.
+_NUMERO_OU_TELEFONE = re.compile(r'[+-]?[\d\s().-]+')
+
+
+def celula_csv(valor) -> str:
+    """Converte um valor em célula CSV, neutralizando fórmulas (injeção de CSV).
+
+    Nome, email e telefone vêm do auto-cadastro público; um valor como `=HYPERLINK(...)` seria
+    executado ao abrir o arquivo numa planilha, então recebe um apóstrofo na frente. Telefones
+    e números (`+5582...`, `-3`) são mantidos como estão.
+    """
+    if valor is None:
+        return ''
+    valor = str(valor)
+    if valor.startswith(_INICIO_DE_FORMULA) and not _NUMERO_OU_TELEFONE.fullmatch(valor):
+        return "'" + valor
+    return valor
+
+
+def linhas_csv(registros: Iterable[dict], campos: Sequence[str]) -> Iterator[str]:
+    """Serializa registros como CSV (com cabeçalho), uma linha por vez."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(campos)
+    yield buffer.getvalue()
+    for registro in registros:
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow([celula_csv(registro.get(c)) for c in campos])
+        yield buffer.getvalue()
+
+
+def linhas_ndjson(registros: Iterable[dict], campos: Sequence[str]) -> Iterator[str]:
+    """Serializa registros como NDJSON (um objeto JSON por linha)."""
+    for registro in registros:
+        yield json.dumps({c: registro.get(c) for c in campos}, ensure_ascii=False) + '\n'
+
+
+def exportar(repo: JSONRepository, representante_email: str, recurso: str, formato: str = 'csv',
+             campos: Optional[Sequence[str]] = None, inicio: Optional[date] = None,
+             fim: Optional[date] = None) -> Iterator[str]:
+    """Gera o conteúdo da exportação em pedaços de texto.
+
+    Valida recurso, formato e campos antes de retornar o gerador, para que erros de
+    parâmetro apareçam antes do início da resposta em streaming.
+    """
+    if recurso not in RECURSOS:
+        raise ValueError(f'recurso inválido: {recurso}')
+    if formato not in FORMATOS:
+        raise ValueError(f'formato inválido: {formato}')
+    campos = validar_campos(recurso, campos)
+    if recurso == 'alunos':
+        registros = repo.iter_alunos_of_representante(representante_email)
+    else:
+        registros = repo.iter_mensagens_of_representante(representante_email)
+    registros = filtrar_periodo(registros, RECURSOS[recurso][1], inicio, fim)
+    serializar = linhas_csv if formato == 'csv' else linhas_ndjson
+    return serializar(registros, campos)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Exporta alunos ou mensagens de um representante.')
+    parser.add_argument('representante', help='email do representante')
+    parser.add_argument('recurso', choices=sorted(RECURSOS))
+    parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+    parser.add_argument('--campos', help='lista separada por vírgulas (padrão: todos)')
+    parser.add_argument('--de', dest='inicio', help='data inicial YYYY-MM-DD (inclusive)')
+    parser.add_argument('--ate', dest='fim', help='data final YYYY-MM-DD (inclusive)')
+    parser.add_argument('--db', default='db.json')
+    parser.add_argument('--saida', help='arquivo de saída (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    try:
+        campos = [c.strip() for c in args.campos.split(',') if c.strip()] if args.campos else None
+        pedacos = exportar(JSONRepository(args.db), args.representante, args.recurso, args.formato,
+                           campos, ler_data(args.inicio), ler_data(args.fim))
+    except ValueError as e:
+        parser.error(str(e))
+
+    saida = open(args.saida, 'w', encoding='utf-8', newline='') if args.saida else sys.stdout
+    try:
+        for pedaco in pedacos:
+            saida.write(pedaco)
+    finally:
+        if args.saida:
+            saida.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Limitador de taxa (token bucket) compartilhado entre workers, para rotas públicas.
+
+Os baldes ficam em um SQLite local (`<db>.limites.sqlite3`, stdlib): cada verificação é uma
+transação curta que recarrega os tokens pelo tempo decorrido e consome um, de modo que todos
+os workers (processos) do servidor veem o mesmo saldo. O arquivo é independente do `db.json`
+e do seu lock, então rejeitar uma requisição nunca disputa o lock de escrita do banco.
+
+Também guarda contadores de rejeição por motivo, usados para calibrar os limites:
+
+    python -m services.limitador --db db.json
+
+e um índice `(representante, email)` dos alunos cadastrados pelo serviço, usado para recusar
+duplicatas do auto-cadastro sem carregar o `db.json` (ver `aluno_conhecido`).
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+
+class LimitadorDeTaxa:
+    """Token buckets por `(escopo, chave)` persistidos em SQLite e compartilhados entre processos.
+
+    Cada balde começa cheio (`capacidade` tokens) e recarrega `capacidade / janela_s` tokens por
+    segundo. Falhas do SQLite (ex: banco ocupado além do timeout) liberam a requisição: o
+    limitador protege o lock do banco, mas não deve derrubar cadastros legítimos.
+    """
+
+    # A cada quantas verificações (por processo) os baldes já cheios são apagados.
+    LIMPEZA_A_CADA = 1000
+
+    def __init__(self, caminho: str, timeout: float = 1.0):
+        self.caminho = caminho
+        self._timeout = timeout
+        self._local = threading.local()
+        self._verificacoes = 0
+        self._janela_max = 0.0
+
+    def _conexao(self) -> sqlite3.Connection:
+        # Uma conexão por thread e por processo (conexões SQLite não sobrevivem a um fork).
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=self._timeout, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=OFF')
+            conexao.execute('CREATE TABLE IF NOT EXISTS baldes (escopo TEXT, chave TEXT, tokens REAL, '
+                            'atualizado REAL, PRIMARY KEY (escopo, chave))')
+            conexao.execute('CREATE TABLE IF NOT EXISTS contadores (nome TEXT PRIMARY KEY, valor INTEGER)')
+            conexao.execute('CREATE TABLE IF NOT EXISTS alunos (representante TEXT, email TEXT, versao INTEGER, '
+                            'PRIMARY KEY (representante, email))')
+            conexao.execute('CREATE TABLE IF NOT EXISTS alunos_invalidados (representante TEXT PRIMARY KEY, '
+                            'versao INTEGER)')
+            self._local.conexao, self._local.pid = conexao, os.getpid()
+        return conexao
+
+    def permitir(self, escopo: str, chave: str, capacidade: int, janela_s: float) -> float:
+        """Consome um token do balde. Retorna 0 se permitido, ou quantos segundos esperar.
+
+        Rejeições incrementam o contador `rejeitado_<escopo>`.
+        """
+        taxa = capacidade / janela_s
+        self._janela_max = max(self._janela_max, janela_s)
+        agora = time.time()
+        try:
+            conexao = self._conexao()
+            conexao.execute('BEGIN IMMEDIATE')
+            try:
+                linha = conexao.execute('SELECT tokens, atualizado FROM baldes WHERE escopo = ? AND chave = ?',
+                                        (escopo, chave)).fetchone()
+                tokens = capacidade if linha is None else min(capacidade, linha[0] + (agora - linha[1]) * taxa)
+                if tokens >= 1:
+                    tokens -= 1
+                    espera = 0.0
+                else:
+                    espera = (1 - tokens) / taxa
+                    self._incrementar(conexao, f'rejeitado_{escopo}')
+                conexao.execute('INSERT OR REPLACE INTO baldes VALUES (?, ?, ?, ?)', (escopo, chave, tokens, agora))
+                conexao.execute('COMMIT')
+            except BaseException:
+                conexao.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"Limitador indisponível, requisição liberada: {e}")
+            return 0.0
+        self._verificacoes += 1
+        if self._verificacoes % self.LIMPEZA_A_CADA == 0:
+            self._limpar(agora)
+        return espera
+
+    def _limpar(self, agora: float) -> None:
+        """Apaga baldes parados há mais que a maior janela (já estariam cheios de novo)."""
+        try:
+            self._conexao().execute('DELETE FROM baldes WHERE atualizado < ?', (agora - self._janela_max,))
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _incrementar(conexao: sqlite3.Connection, nome: str, n: int = 1) -> None:
+        conexao.execute('INSERT INTO contadores VALUES (?, ?) ON CONFLICT(nome) DO UPDATE SET valor = valor + ?',
+                        (nome, n, n))
+
+    def incrementar(self, nome: str, n: int = 1) -> None:
+        """Incrementa um contador compartilhado (ex: `rejeitado_duplicado`, `aceito`)."""
+        try:
+            self._incrementar(self._conexao(), nome, n)
+        except sqlite3.Error:
+            pass
+
+    def contadores(self) -> dict:
+        """Retorna `{nome: valor}` de todos os contadores."""
+        try:
+            return dict(self._conexao().execute('SELECT nome, valor FROM contadores ORDER BY nome'))
+        except sqlite3.Error:
+            return {}
+
+    def zerar_contadores(self) -> None:
+        self._conexao().execute('DELETE FROM contadores')
+
+    # --- Índice de alunos ---
+    # Cada entrada diz "na versão `versao` do representante, o email existia". Remoções e trocas de
+    # email registram em `alunos_invalidados` a versão a partir da qual o índice não vale; entradas
+    # mais antigas são ignoradas, mesmo as gravadas depois por outro worker (corrida com o cadastro).
+
+    def lembrar_aluno(self, representante: str, email: str, versao: int) -> None:
+        """Registra que `email` existia no representante na versão `versao`."""
+        try:
+            self._conexao().execute('INSERT OR REPLACE INTO alunos VALUES (?, ?, ?)',
+                                    (representante.lower(), email.lower(), versao))
+        except sqlite3.Error:
+            pass
+
+    def esquecer_alunos(self, representante: str, versao: int) -> None:
+        """Invalida as entradas do representante até `versao` (após remoção ou troca de email)."""
+        representante = representante.lower()
+        try:
+            conexao = self._conexao()
+            conexao.execute('INSERT INTO alunos_invalidados VALUES (?, ?) ON CONFLICT(representante) '
+                            'DO UPDATE SET versao = max(versao, excluded.versao)', (representante, versao))
+            conexao.execute('DELETE FROM alunos WHERE representante = ? AND versao <= ?', (representante, versao))
+        except sqlite3.Error:
+            pass
+
+    def aluno_conhecido(self, representante: str, email: str) -> bool:
+        """True se o índice garante que o email já está cadastrado. False não garante o contrário."""
+        try:
+            linha = self._conexao().execute(
+                'SELECT 1 FROM alunos a LEFT JOIN alunos_invalidados i ON i.representante = a.representante '
+                'WHERE a.representante = ? AND a.email = ? AND a.versao > coalesce(i.versao, -1)',
+                (representante.lower(), email.lower())).fetchone()
+        except sqlite3.Error:
+            return False
+        return linha is not None
+
+    def limpar_indice(self) -> None:
+        self._conexao().execute('DELETE FROM alunos')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Mostra os contadores do limitador de auto-cadastro.')
+    parser.add_argument('--db', default='db.json')
+    parser.add_argument('--zerar', action='store_true', help='zera os contadores depois de mostrá-los')
+    parser.add_argument('--limpar-indice', action='store_true',
+                        help='apaga o índice de alunos (ex: depois de editar o db.json fora do servidor)')
+    args = parser.parse_args(argv)
+
+    limitador = LimitadorDeTaxa(f'{args.db}.limites.sqlite3')
+    print(json.dumps(limitador.contadores(), ensure_ascii=False, indent=2))
+    if args.zerar:
+        limitador.zerar_contadores()
+    if args.limpar_indice:
+        limitador.limpar_indice()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
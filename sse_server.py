@@ -0,0 +1,150 @@
+"""
+sse_server.py
+-------------
+Servidor assíncrono dedicado ao feed de alterações (Server-Sent Events) do Representa.
+
+A rota `/api/eventos` do Flask funciona, mas em workers síncronos cada dashboard aberto
+prende um worker. Este servidor atende as mesmas conexões com `asyncio` (stdlib), de modo
+que milhares de conexões ociosas custam apenas uma corrotina e uma fila cada:
+
+- A autenticação reaproveita o cookie de sessão assinado do Flask (mesma `FLASK_SECRET_KEY`).
+- Uma única tarefa por representante observa o feed em arquivo (`CentralDeEventos`), e
+  eventos publicados por qualquer worker do Flask são distribuídos a todas as conexões.
+
+Uso:
+    python sse_server.py --porta 8001
+    # e no servidor Flask: EVENTOS_URL=http://<host>:8001/api/eventos
+
+Se o dashboard for servido em outra origem (outra porta), defina SSE_ORIGEM_PERMITIDA com a
+origem do Flask (ex: http://localhost:5000) para liberar o CORS com credenciais.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlsplit
+
+from server import app
+from services.controle_representates import service
+from services.eventos import CentralDeEventos, formatar_evento_sse
+
+ORIGEM_PERMITIDA = os.getenv('SSE_ORIGEM_PERMITIDA')
+HEARTBEAT = 15.0
+
+
+def ler_sessao(cabecalho_cookie: str):
+    """Decodifica o cookie de sessão do Flask e retorna o email do usuário logado, ou None."""
+    if not cabecalho_cookie:
+        return None
+    cookie = SimpleCookie()
+    try:
+        cookie.load(cabecalho_cookie)
+    except Exception:
+        return None
+    morsel = cookie.get(app.config['SESSION_COOKIE_NAME'])
+    serializer = app.session_interface.get_signing_serializer(app)
+    if morsel is None or serializer is None:
+        return None
+    try:
+        dados = serializer.loads(morsel.value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except Exception:
+        return None
+    return dados.get('user_email')
+
+
+def _cabecalhos_cors() -> str:
+    if not ORIGEM_PERMITIDA:
+        return ''
+    return (f'Access-Control-Allow-Origin: {ORIGEM_PERMITIDA}\r\n'
+            'Access-Control-Allow-Credentials: true\r\n')
+
+
+async def _responder_erro(writer, status: str, mensagem: str) -> None:
+    corpo = json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8')
+    writer.write((f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                  f'Content-Length: {len(corpo)}\r\n{_cabecalhos_cors()}Connection: close\r\n\r\n').encode() + corpo)
+    await writer.drain()
+
+
+class ServidorSSE:
+    def __init__(self, central: CentralDeEventos):
+        self.central = central
+
+    async def atender(self, reader, writer):
+        try:
+            bruto = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=10)
+        except Exception:
+            writer.close()
+            return
+        try:
+            linha, *linhas = bruto.decode('latin-1').split('\r\n')
+            metodo, alvo, _ = linha.split(' ', 2)
+            cabecalhos = {}
+            for l in linhas:
+                if ':' in l:
+                    chave, valor = l.split(':', 1)
+                    cabecalhos[chave.strip().lower()] = valor.strip()
+            url = urlsplit(alvo)
+
+            if metodo != 'GET' or url.path != '/api/eventos':
+                await _responder_erro(writer, '404 Not Found', 'rota não encontrada')
+                return
+            email = ler_sessao(cabecalhos.get('cookie'))
+            if email is None:
+                await _responder_erro(writer, '401 Unauthorized', 'não autenticado')
+                return
+            rep_id = service.id_representante(email)
+            if rep_id is None:
+                await _responder_erro(writer, '404 Not Found', 'representante não encontrado')
+                return
+            try:
+                desde = int(cabecalhos.get('last-event-id') or parse_qs(url.query).get('desde', ['0'])[0])
+            except ValueError:
+                desde = 0
+            await self._transmitir(writer, rep_id, desde)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _transmitir(self, writer, rep_id: str, desde: int) -> None:
+        writer.write(('HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                      f'{_cabecalhos_cors()}Connection: keep-alive\r\n\r\nretry: 3000\n\n').encode())
+        await writer.drain()
+        fila = self.central.assinar(rep_id, desde)
+        ultima = desde
+        try:
+            while True:
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=HEARTBEAT)
+                except asyncio.TimeoutError:
+                    evento = None
+                if evento is not None:
+                    # A fila pode repetir eventos do histórico já enviados.
+                    if evento.get('tipo') != 'ressincronizar' and evento.get('versao', 0) <= ultima:
+                        continue
+                    ultima = max(ultima, evento.get('versao', 0))
+                writer.write(formatar_evento_sse(evento).encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.central.cancelar(rep_id, fila)
+
+
+async def executar(host: str, porta: int, intervalo: float) -> None:
+    servidor_sse = ServidorSSE(CentralDeEventos(service.feed_eventos, intervalo=intervalo))
+    servidor = await asyncio.start_server(servidor_sse.atender, host, porta)
+    print(f"Servidor SSE ouvindo em http://{host}:{porta}/api/eventos")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor SSE dedicado do Representa.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8001)
+    parser.add_argument('--intervalo', type=float, default=1.0,
+                        help='intervalo (s) entre verificações do feed em arquivo')
+    args = parser.parse_args()
+    asyncio.run(executar(args.host, args.porta, args.intervalo))
@@ -0,0 +1,97 @@
+"""Migração do histórico inline de mensagens para o arquivo particionado por mês."""
+import copy
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from controle_db import JSONRepository, MENSAGENS_RECENTES, PARTICAO_SEM_DATA
+from services.chart_service import get_dashboard_chart_data
+from services.controle_representates import RepresentanteService
+
+EMAIL = 'rep@exemplo.com'
+FORMATO = "%d/%m/%Y %H:%M:%S"
+
+
+def _mensagens_inline() -> list:
+    """Uma mensagem sem data (como no db.json existente) seguida de 60 mensagens em três meses."""
+    inicio = datetime.now() - timedelta(days=70)
+    mensagens = [{'assunto': 'Test', 'corpo': 'Body'}]
+    for i in range(60):
+        data = (inicio + timedelta(days=i, hours=i % 5)).strftime(FORMATO)
+        mensagens.append({'assunto': f'm{i}', 'corpo': 'x', 'data': data})
+    return mensagens
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = JSONRepository(str(tmp_path / 'db.json'))
+    repo.add_representante('rep', EMAIL, '1', 'hash')
+    data = repo.load()
+    rep = data['representantes'][0]
+    rep['metadata']['created_at'] = (datetime.now() - timedelta(days=80)).strftime(FORMATO)
+    rep['mensagens'] = _mensagens_inline()
+    repo.save(data)
+    return repo
+
+
+def _particoes(repo) -> dict:
+    diretorio = os.path.join(repo.arquivo_path, 'r1')
+    conteudo = {}
+    for nome in sorted(os.listdir(diretorio)):
+        with open(os.path.join(diretorio, nome), 'r', encoding='utf-8') as f:
+            conteudo[nome] = f.read()
+    return conteudo
+
+
+def test_migracao_preserva_ordem_com_mensagem_sem_data(repo):
+    originais = copy.deepcopy(repo.get_representante_by_email(EMAIL)['mensagens'])
+
+    assert repo.migrar_mensagens_para_arquivo() == 1
+
+    assert list(_particoes(repo))[0] == f'{PARTICAO_SEM_DATA}.ndjson'
+    assert repo.get_mensagens_of_representante(EMAIL) == originais
+    recentes_primeiro = list(reversed(originais))
+    assert repo.get_mensagens_of_representante(EMAIL, pagina=1, por_pagina=25) == recentes_primeiro[:25]
+    assert repo.get_mensagens_of_representante(EMAIL, pagina=3, por_pagina=25) == recentes_primeiro[50:]
+    assert repo.get_mensagens_of_representante(EMAIL, pagina=3, por_pagina=25)[-1]['assunto'] == 'Test'
+
+
+def test_migracao_e_idempotente(repo):
+    assert repo.migrar_mensagens_para_arquivo() == 1
+    particoes = _particoes(repo)
+    rep = copy.deepcopy(repo.get_representante_by_email(EMAIL))
+
+    assert repo.migrar_mensagens_para_arquivo() == 0
+    assert _particoes(repo) == particoes
+    assert repo.get_representante_by_email(EMAIL) == rep
+
+
+def test_contadores_apos_migracao(repo):
+    originais = copy.deepcopy(repo.get_representante_by_email(EMAIL)['mensagens'])
+    repo.migrar_mensagens_para_arquivo()
+    rep = repo.get_representante_by_email(EMAIL)
+
+    por_dia = {}
+    for m in originais[1:]:
+        dia = datetime.strptime(m['data'], FORMATO).strftime('%Y-%m-%d')
+        por_dia[dia] = por_dia.get(dia, 0) + 1
+    assert rep['mensagens_total'] == len(originais)
+    assert rep['mensagens_por_dia'] == por_dia
+    assert rep['mensagens'] == originais[-MENSAGENS_RECENTES:]
+
+    nova = {'assunto': 'nova', 'corpo': 'x', 'data': datetime.now().strftime(FORMATO)}
+    repo.adicionar_mensagem(EMAIL, nova)
+    rep = repo.get_representante_by_email(EMAIL)
+    assert rep['mensagens_total'] == len(originais) + 1
+    assert rep['mensagens'][-1] == nova and len(rep['mensagens']) == MENSAGENS_RECENTES
+    assert repo.get_mensagens_of_representante(EMAIL, pagina=1, por_pagina=1) == [nova]
+
+
+def test_graficos_iguais_antes_e_depois_da_migracao(repo):
+    service = RepresentanteService(repo.path)
+    antes = get_dashboard_chart_data(service.retornar_representante(EMAIL))
+    repo.migrar_mensagens_para_arquivo()
+    depois = get_dashboard_chart_data(service.retornar_representante(EMAIL))
+    assert depois == antes
+    assert sum(depois['msg_chart_values']) == 60
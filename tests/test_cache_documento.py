@@ -0,0 +1,29 @@
+"""Cache de leitura do `JSONRepository` compartilhado entre instâncias (workers)."""
+import os
+
+from controle_db import JSONRepository
+
+
+def test_cache_revalida_mesmo_com_stat_repetido(tmp_path):
+    escritor = JSONRepository(str(tmp_path / 'db.json'))
+    leitor = JSONRepository(str(tmp_path / 'db.json'))
+    escritor.add_representante('rep', 'rep@exemplo.com', '1', 'hash')
+    aluno = escritor.add_aluno('rep@exemplo.com', 'aluno', 'aluno@exemplo.com', '1')
+    assert leitor.get_alunos_of_representante('rep@exemplo.com')[0]['telefone'] == '1'
+
+    # A -> B -> A' com inode, tamanho e mtime iguais aos de A: só a geração distingue os estados.
+    st = os.stat(escritor.path)
+    inode_de_a = str(tmp_path / 'inode-de-a')
+    os.link(escritor.path, inode_de_a)
+    escritor.update_aluno('rep@exemplo.com', aluno['id'], {'telefone': '2'})
+    escritor.update_aluno('rep@exemplo.com', aluno['id'], {'telefone': '3'})
+    with open(escritor.path, 'rb') as f:
+        conteudo = f.read()
+    with open(inode_de_a, 'r+b') as f:
+        f.write(conteudo)
+    os.replace(inode_de_a, escritor.path)
+    os.utime(escritor.path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    repetido = os.stat(escritor.path)
+    assert (repetido.st_ino, repetido.st_mtime_ns, repetido.st_size) == (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    assert leitor.get_alunos_of_representante('rep@exemplo.com')[0]['telefone'] == '3'
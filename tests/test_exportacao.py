@@ -0,0 +1,33 @@
+"""Exportação CSV: neutralização de fórmulas sem alterar telefones."""
+import csv
+import io
+
+from controle_db import JSONRepository
+from services.exportacao import celula_csv, exportar
+
+EMAIL = 'rep@exemplo.com'
+
+
+def test_celula_csv_mantem_telefones_e_numeros():
+    assert celula_csv('+5582999998888') == '+5582999998888'
+    assert celula_csv('+55 (82) 99999-8888') == '+55 (82) 99999-8888'
+    assert celula_csv('-3') == '-3'
+    assert celula_csv(None) == ''
+
+
+def test_celula_csv_neutraliza_formulas():
+    assert celula_csv('=HYPERLINK("http://x","y")') == '\'=HYPERLINK("http://x","y")'
+    assert celula_csv('+SUM(A1:A2)') == "'+SUM(A1:A2)"
+    assert celula_csv('-1+cmd|calc') == "'-1+cmd|calc"
+    assert celula_csv('@SUM(A1)') == "'@SUM(A1)"
+
+
+def test_exportar_alunos_csv(tmp_path):
+    repo = JSONRepository(str(tmp_path / 'db.json'))
+    repo.add_representante('rep', EMAIL, '1', 'hash')
+    repo.add_aluno(EMAIL, '=hyperlink("http://x","clique")', 'a@exemplo.com', '+5582999998888')
+
+    conteudo = ''.join(exportar(repo, EMAIL, 'alunos', 'csv', ['nome', 'telefone']))
+    linhas = list(csv.reader(io.StringIO(conteudo)))
+
+    assert linhas == [['nome', 'telefone'], ['\'=hyperlink("http://x","clique")', '+5582999998888']]
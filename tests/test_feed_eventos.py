@@ -0,0 +1,104 @@
+"""Feed de eventos: compactação com leitores lentos e o fan-out do servidor SSE."""
+import asyncio
+import os
+import random
+
+from controle_db import FeedDeEventos, JSONRepository
+from services.eventos import CentralDeEventos
+
+MAX_BYTES = 16 * 1024
+
+
+def _publicar(feed, versao, tamanho):
+    feed.publicar('r1', versao, 'aluno_atualizado', {'id': 'a1', 'nome': 'x' * tamanho})
+
+
+def _acompanhar(feed, posicao, ultima):
+    """Uma verificação do leitor: retorna `(posicao, ultima, versões recebidas)`."""
+    if not feed.mudou('r1', posicao):
+        return posicao, ultima, []
+    eventos, posicao = feed.ler('r1', posicao)
+    novos = FeedDeEventos.eventos_apos(eventos, ultima)
+    return posicao, (novos[-1]['versao'] if novos else ultima), [e['versao'] for e in novos]
+
+
+def test_compactacao_mantem_arquivo_abaixo_do_limite(tmp_path):
+    feed = FeedDeEventos(str(tmp_path / 'eventos'), max_bytes=MAX_BYTES)
+    for versao in range(1, 401):
+        _publicar(feed, versao, 1000)
+        assert os.path.getsize(feed._arquivo('r1')) <= MAX_BYTES + 1100
+
+    # Cada compactação libera metade do limite: nada de regravar o arquivo a cada publicação.
+    assert feed._ler_geracao('r1') <= 400 * 1000 // (MAX_BYTES // 2) + 1
+
+
+def test_leitor_lento_nao_perde_eventos_apos_compactacao(tmp_path):
+    feed = FeedDeEventos(str(tmp_path / 'eventos'), max_bytes=MAX_BYTES)
+    aleatorio = random.Random(7)
+    _publicar(feed, 1, 10)
+    posicao, ultima, recebidas = _acompanhar(feed, None, 0)
+    for versao in range(2, 601):
+        # Tamanhos variados: com posição por (inode, offset) o leitor caía no meio de uma linha.
+        _publicar(feed, versao, aleatorio.randint(200, 1800))
+        if versao % 2 == 0:
+            posicao, ultima, novas = _acompanhar(feed, posicao, ultima)
+            recebidas += novas
+
+    assert feed._ler_geracao('r1') > 10
+    assert recebidas == list(range(1, 601))
+
+
+def test_central_distribui_tudo_durante_compactacoes(tmp_path):
+    feed = FeedDeEventos(str(tmp_path / 'eventos'), max_bytes=MAX_BYTES)
+    _publicar(feed, 1, 10)
+
+    async def cenario():
+        central = CentralDeEventos(feed, intervalo=0.001)
+        fila = central.assinar('r1', 1)
+        aleatorio = random.Random(11)
+        for versao in range(2, 301):
+            _publicar(feed, versao, aleatorio.randint(200, 1800))
+            if versao % 3 == 0:
+                await asyncio.sleep(0.005)
+        await asyncio.sleep(0.05)
+        assert 'r1' in central._tarefas
+        recebidos = []
+        while not fila.empty():
+            recebidos.append(fila.get_nowait())
+        central.cancelar('r1', fila)
+        return recebidos
+
+    recebidos = asyncio.run(cenario())
+    assert [e['tipo'] for e in recebidos if e['tipo'] == 'ressincronizar'] == []
+    assert [e['versao'] for e in recebidos] == list(range(2, 301))
+
+
+def test_central_reposiciona_apos_leitura_ilegivel(tmp_path):
+    feed = FeedDeEventos(str(tmp_path / 'eventos'), max_bytes=MAX_BYTES)
+    for versao in range(1, 4):
+        _publicar(feed, versao, 10)
+
+    async def cenario():
+        central = CentralDeEventos(feed, intervalo=0.001)
+        fila = central.assinar('r1', 3)
+        # Posição corrompida (como um offset no meio de uma linha): o observador se recupera.
+        geracao, inode, offset = central._posicoes['r1']
+        central._posicoes['r1'] = (geracao, inode, offset - 5)
+        await asyncio.sleep(0.01)
+        _publicar(feed, 4, 10)
+        await asyncio.sleep(0.02)
+        assert 'r1' in central._tarefas
+        central.cancelar('r1', fila)
+        return fila.get_nowait()
+
+    assert asyncio.run(cenario())['versao'] == 4
+
+
+def test_evento_de_mensagem_sem_corpo(tmp_path):
+    repo = JSONRepository(str(tmp_path / 'db.json'))
+    repo.add_representante('rep', 'rep@exemplo.com', '1', 'hash')
+    repo.adicionar_mensagem('rep@exemplo.com', {'assunto': 'Prova', 'corpo': 'x' * 5000, 'data': '01/03/2026 10:00:00'})
+
+    eventos, _ = repo.eventos.ler('r1')
+    assert eventos[-1]['tipo'] == 'mensagem'
+    assert eventos[-1]['dados'] == {'assunto': 'Prova', 'data': '01/03/2026 10:00:00'}
@@ -0,0 +1,50 @@
+"""Auto-cadastro público: recusa de duplicatas pelo índice de alunos, sem carregar o banco."""
+import pytest
+
+from services.controle_representates import RegistroRejeitado, RepresentanteService
+
+EMAIL = 'rep@exemplo.com'
+LIMITE = (1000, 60)
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = RepresentanteService(str(tmp_path / 'db.json'))
+    service.adicionar_representante('rep', EMAIL, '1', 'hash')
+    return service
+
+
+def _registrar(service, email, representante=EMAIL):
+    return service.registrar_aluno_publico(representante, 'aluno', email, '1', '10.0.0.1', LIMITE, LIMITE)
+
+
+def _motivo(service, email, representante=EMAIL):
+    with pytest.raises(RegistroRejeitado) as erro:
+        _registrar(service, email, representante)
+    return erro.value.motivo
+
+
+def test_duplicata_recusada_sem_carregar_o_banco(service):
+    _registrar(service, 'Aluno@exemplo.com')
+    service._repo._documento_cache = None
+
+    assert _motivo(service, 'aluno@exemplo.com') == 'duplicado'
+    assert _motivo(service, 'aluno@exemplo.com', 'outro@exemplo.com') == 'representante_inexistente'
+    assert service._repo._documento_cache is None
+
+
+def test_duplicata_fora_do_indice_recusada_sob_o_lock(service):
+    service._repo.add_aluno(EMAIL, 'aluno', 'aluno@exemplo.com', '1')
+    assert _motivo(service, 'aluno@exemplo.com') == 'duplicado'
+
+
+def test_remocao_e_troca_de_email_liberam_o_cadastro(service):
+    aluno = _registrar(service, 'aluno@exemplo.com')
+    service.remover_aluno(EMAIL, aluno.id)
+    aluno = _registrar(service, 'aluno@exemplo.com')
+
+    _, versao = service.alterar_aluno(EMAIL, 'atualizar', aluno.id, {'email': 'novo@exemplo.com'})
+    # Entrada antiga gravada depois da invalidação (corrida com outro worker) continua ignorada.
+    service._limitador.lembrar_aluno(EMAIL, 'aluno@exemplo.com', versao - 1)
+    _registrar(service, 'aluno@exemplo.com')
+    assert _motivo(service, 'novo@exemplo.com') == 'duplicado'